@@ -0,0 +1,225 @@
+"""Time the stages of the generator on synthetic configs, and report JSON.
+
+Each scenario is run ``--repeat`` times on a config generated for each preset
+by :mod:`synthetic`, in a temporary directory. Only the stage named by the
+scenario is timed: reading inputs, generating files needed by the stage and
+restoring files modified by it happen outside the timed region.
+
+The results are written as JSON, together with the versions of the generator
+and Python, so they can be compared release over release::
+
+    python benchmarks/run.py --preset small --preset large --output results.json
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import typing
+import warnings
+
+import synthetic
+import yaml
+
+from rapids_dependency_file_generator import Config, Output, __version__, load_config_from_file
+from rapids_dependency_file_generator._rapids_dependency_file_generator import (
+    delete_existing_files,
+    make_dependency_files,
+)
+from rapids_dependency_file_generator._rapids_dependency_file_validator import validate_dependencies
+
+PRESETS = {
+    "small": synthetic.Parameters(),
+    "medium": synthetic.Parameters(
+        file_keys=30,
+        dependency_sets=200,
+        specific_entries=3,
+        glob_patterns=2,
+        matrix_axes=2,
+        axis_cardinality=4,
+        packages_per_entry=5,
+        includes_per_file=30,
+    ),
+    "large": synthetic.Parameters(
+        file_keys=100,
+        dependency_sets=1000,
+        specific_entries=4,
+        glob_patterns=3,
+        matrix_axes=2,
+        axis_cardinality=6,
+        packages_per_entry=5,
+        includes_per_file=50,
+    ),
+}
+
+
+@dataclasses.dataclass
+class Workspace:
+    """A synthetic config written to a temporary directory."""
+
+    directory: str
+    config_file: str
+    config: dict[str, typing.Any]
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.join(self.directory, "output")
+
+    @property
+    def pyproject_file(self) -> str:
+        return os.path.join(self.output_dir, "pyproject.toml")
+
+    def file_keys(self, *, pyproject: bool) -> list[str]:
+        return [
+            file_key for file_key in self.config["files"] if (file_key in synthetic.PYPROJECT_FILE_KEYS) == pyproject
+        ]
+
+
+def _time(function: typing.Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _write_files(parsed_config: Config, file_keys: list[str]) -> None:
+    make_dependency_files(
+        parsed_config=parsed_config,
+        file_keys=file_keys,
+        output=None,
+        matrix=None,
+        prepend_channels=[],
+        to_stdout=False,
+    )
+
+
+def load_config(workspace: Workspace) -> float:
+    return _time(lambda: load_config_from_file(workspace.config_file))
+
+
+def validate(workspace: Workspace) -> float:
+    return _time(lambda: validate_dependencies(workspace.config))
+
+
+def generate_to_disk(workspace: Workspace) -> float:
+    parsed_config = load_config_from_file(workspace.config_file)
+    return _time(lambda: _write_files(parsed_config, workspace.file_keys(pyproject=False)))
+
+
+def generate_to_stdout(workspace: Workspace) -> float:
+    # Merge the requirements of every file key for one matrix combination, as done
+    # when creating test environments in CI.
+    parsed_config = load_config_from_file(workspace.config_file)
+    first_file = parsed_config.files[workspace.file_keys(pyproject=False)[0]]
+    matrix = {axis: values[:1] for axis, values in first_file.matrix.items()}
+
+    def generate() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            make_dependency_files(
+                parsed_config=parsed_config,
+                file_keys=workspace.file_keys(pyproject=False),
+                output={Output.REQUIREMENTS},
+                matrix=matrix,
+                prepend_channels=[],
+                to_stdout=True,
+            )
+
+    return _time(generate)
+
+
+def edit_pyproject(workspace: Workspace) -> float:
+    with open(workspace.pyproject_file, "w") as f:
+        f.write(synthetic.make_pyproject())
+    parsed_config = load_config_from_file(workspace.config_file)
+    return _time(lambda: _write_files(parsed_config, workspace.file_keys(pyproject=True)))
+
+
+def delete_files(workspace: Workspace) -> float:
+    _write_files(load_config_from_file(workspace.config_file), workspace.file_keys(pyproject=False))
+    return _time(lambda: delete_existing_files(workspace.output_dir))
+
+
+SCENARIOS: dict[str, typing.Callable[[Workspace], float]] = {
+    "load_config_from_file": load_config,
+    "validate_dependencies": validate,
+    "make_dependency_files": generate_to_disk,
+    "make_dependency_files_stdout": generate_to_stdout,
+    "pyproject": edit_pyproject,
+    "delete_existing_files": delete_files,
+}
+
+
+def run(
+    presets: typing.Iterable[str], scenarios: typing.Iterable[str], repeat: int
+) -> typing.Generator[dict[str, typing.Any], None, None]:
+    """Run scenarios on presets, yielding one result per combination."""
+    for preset in presets:
+        parameters = PRESETS[preset]
+        directory = tempfile.mkdtemp(prefix=f"dfg-benchmark-{preset}-")
+        try:
+            config_file = synthetic.write_config(parameters, directory)
+            with open(config_file) as f:
+                workspace = Workspace(directory=directory, config_file=config_file, config=yaml.safe_load(f))
+            for scenario in scenarios:
+                print(f"{preset}: {scenario}", file=sys.stderr)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    times = [SCENARIOS[scenario](workspace) for _ in range(repeat)]
+                yield {
+                    "preset": preset,
+                    "parameters": dataclasses.asdict(parameters),
+                    "scenario": scenario,
+                    "times": times,
+                    "min": min(times),
+                    "median": statistics.median(times),
+                    "mean": statistics.mean(times),
+                }
+        finally:
+            shutil.rmtree(directory)
+
+
+def main(argv: typing.Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--preset",
+        action="append",
+        choices=PRESETS,
+        help="A config size to run the scenarios on. Can be passed multiple times. Defaults to all presets.",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="A scenario to run. Can be passed multiple times. Defaults to all scenarios.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="The number of times to run each scenario.")
+    parser.add_argument("--output", help="The file to write the results to. Defaults to stdout.")
+    args = parser.parse_args(argv)
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "results": list(run(args.preset or list(PRESETS), args.scenario or list(SCENARIOS), args.repeat)),
+    }
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Generate synthetic ``dependencies.yaml`` files of arbitrary size.
+
+The shape of the generated config is controlled by :class:`Parameters`. Every
+file key has a matrix with ``matrix_axes`` axes of ``axis_cardinality`` values
+each, and includes ``includes_per_file`` dependency sets. Every dependency set
+has a ``common`` entry and ``specific_entries`` specific entries, each with one
+matrix entry per value of an axis, some of which match with glob patterns,
+followed by a fallback entry. All the generated files are valid, so they can be
+used to time every stage of the generator.
+
+Run this module as a script to write a config to disk::
+
+    python benchmarks/synthetic.py --file-keys 50 --dependency-sets 200 --output-dir /tmp/synthetic
+"""
+
+import argparse
+import dataclasses
+import os
+import typing
+
+import yaml
+
+PYPROJECT_FILE_KEYS = {
+    "py_build": {"table": "build-system"},
+    "py_run": {"table": "project"},
+    "py_test": {"table": "project.optional-dependencies", "key": "test"},
+}
+
+
+@dataclasses.dataclass
+class Parameters:
+    """The shape of a synthetic config."""
+
+    file_keys: int = 10
+    """The number of file keys generating conda and requirements files."""
+
+    dependency_sets: int = 50
+    """The number of dependency sets."""
+
+    specific_entries: int = 2
+    """The number of specific entries in each dependency set."""
+
+    glob_patterns: int = 1
+    """The number of matrix entries in each specific entry that use glob patterns."""
+
+    matrix_axes: int = 2
+    """The number of axes in the matrix of each file key."""
+
+    axis_cardinality: int = 3
+    """The number of values of each matrix axis."""
+
+    packages_per_entry: int = 3
+    """The number of packages in each common and matrix entry."""
+
+    includes_per_file: int = 10
+    """The number of dependency sets included by each file key."""
+
+    pyproject: bool = True
+    """Whether to add file keys editing a ``pyproject.toml`` file."""
+
+
+def axis_values(parameters: Parameters) -> list[str]:
+    """Return the values of each matrix axis, such as ``["1.0", "1.1"]``."""
+    return [f"1.{value}" for value in range(parameters.axis_cardinality)]
+
+
+def make_config(parameters: Parameters, output_dir: str = "output") -> dict[str, typing.Any]:
+    """Generate a synthetic config.
+
+    Parameters
+    ----------
+    parameters : Parameters
+        The shape of the config.
+    output_dir : str
+        The directory, relative to the config file, to write generated files to.
+
+    Returns
+    -------
+    dict[str, Any]
+        The config, in the form parsed from ``dependencies.yaml``.
+    """
+    axes = [f"axis{axis}" for axis in range(parameters.matrix_axes)]
+    values = axis_values(parameters)
+    dependency_sets = [f"set{index}" for index in range(parameters.dependency_sets)]
+
+    def packages(prefix: str) -> list[str]:
+        return [f"{prefix}-pkg{index}>=1.{index}" for index in range(parameters.packages_per_entry)]
+
+    dependencies = {}
+    for set_index, name in enumerate(dependency_sets):
+        specific = []
+        for entry_index in range(parameters.specific_entries):
+            axis = axes[(set_index + entry_index) % len(axes)] if axes else None
+            matrices: list[dict[str, typing.Any]] = []
+            if axis is not None:
+                for value_index, value in enumerate(values):
+                    if value_index < parameters.glob_patterns:
+                        # Glob patterns match several values, so they come last.
+                        continue
+                    matrices.append(
+                        {"matrix": {axis: value}, "packages": packages(f"{name}-s{entry_index}-{value_index}")}
+                    )
+                for glob_index in range(min(parameters.glob_patterns, len(values))):
+                    matrices.append(
+                        {
+                            "matrix": {axis: f"1.{glob_index}*"},
+                            "packages": packages(f"{name}-s{entry_index}-g{glob_index}"),
+                        }
+                    )
+            matrices.append({"matrix": None, "packages": packages(f"{name}-s{entry_index}-fallback")})
+            specific.append({"output_types": ["conda", "requirements", "pyproject"], "matrices": matrices})
+        dependencies[name] = {
+            "common": [{"output_types": ["conda", "requirements", "pyproject"], "packages": packages(name)}],
+            "specific": specific,
+        }
+
+    files: dict[str, typing.Any] = {}
+    for file_index in range(parameters.file_keys):
+        files[f"file{file_index}"] = {
+            "output": ["conda", "requirements"],
+            "conda_dir": f"{output_dir}/conda",
+            "requirements_dir": f"{output_dir}/requirements",
+            "matrix": {axis: values for axis in axes},
+            "includes": [
+                dependency_sets[(file_index + include) % len(dependency_sets)]
+                for include in range(min(parameters.includes_per_file, len(dependency_sets)))
+            ],
+        }
+    if parameters.pyproject:
+        for file_index, (file_key, extras) in enumerate(PYPROJECT_FILE_KEYS.items()):
+            files[file_key] = {
+                "output": "pyproject",
+                "pyproject_dir": output_dir,
+                "matrix": {axis: values[:1] for axis in axes},
+                "includes": [
+                    dependency_sets[(file_index + include) % len(dependency_sets)]
+                    for include in range(min(parameters.includes_per_file, len(dependency_sets)))
+                ],
+                "extras": extras,
+            }
+
+    return {"files": files, "channels": ["rapidsai", "conda-forge"], "dependencies": dependencies}
+
+
+def make_pyproject(tables: int = 50) -> str:
+    """Generate a ``pyproject.toml`` file edited by the pyproject file keys.
+
+    Parameters
+    ----------
+    tables : int
+        The number of additional ``[tool.*]`` tables, to make the file larger.
+
+    Returns
+    -------
+    str
+        The contents of the file.
+    """
+    lines = [
+        "[build-system]",
+        'build-backend = "setuptools.build_meta"',
+        'requires = ["setuptools"]',
+        "",
+        "[project]",
+        'name = "synthetic"',
+        'version = "0.0.0"',
+        'dependencies = ["old"]',
+        "",
+        "[project.optional-dependencies]",
+        'test = ["old"]',
+    ]
+    for table in range(tables):
+        lines += ["", f"[tool.synthetic{table}]", "# A comment", 'option = "value"', f"values = [{table}, 1, 2]"]
+    return "\n".join(lines) + "\n"
+
+
+def write_config(parameters: Parameters, directory: typing.Union[str, os.PathLike]) -> str:
+    """Write a synthetic config, and a ``pyproject.toml`` file if needed.
+
+    Parameters
+    ----------
+    parameters : Parameters
+        The shape of the config.
+    directory : str | PathLike
+        The directory to write the config to. Generated files are written to its
+        ``output`` subdirectory.
+
+    Returns
+    -------
+    str
+        The path to the config file.
+    """
+    config_file = os.path.join(directory, "dependencies.yaml")
+    with open(config_file, "w") as f:
+        yaml.safe_dump(make_config(parameters), f, sort_keys=False)
+    if parameters.pyproject:
+        os.makedirs(os.path.join(directory, "output"), exist_ok=True)
+        with open(os.path.join(directory, "output", "pyproject.toml"), "w") as f:
+            f.write(make_pyproject())
+    return config_file
+
+
+def main(argv: typing.Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    for field in dataclasses.fields(Parameters):
+        option = f"--{field.name.replace('_', '-')}"
+        if field.type is bool:
+            parser.add_argument(option, action=argparse.BooleanOptionalAction, default=field.default)
+        else:
+            parser.add_argument(option, type=int, default=field.default)
+    parser.add_argument("-o", "--output-dir", default=".", help="The directory to write the config to.")
+    args = parser.parse_args(argv)
+
+    parameters = Parameters(**{field.name: getattr(args, field.name) for field in dataclasses.fields(Parameters)})
+    print(write_config(parameters, args.output_dir))
+
+
+if __name__ == "__main__":
+    main()
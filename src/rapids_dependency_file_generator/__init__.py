@@ -5,15 +5,23 @@ programmatically generate ``pyproject.toml``, ``requirements.txt``, or
 a Conda environment from ``dependencies.yaml``.
 """
 
-from . import _config, _rapids_dependency_file_generator, _warnings
+from . import _cache, _config, _manifest, _rapids_dependency_file_generator, _timings, _warnings, _writer
+from ._cache import *  # noqa: F401,F403
 from ._config import *  # noqa: F401,F403
+from ._manifest import *  # noqa: F401,F403
 from ._rapids_dependency_file_generator import *  # noqa: F401,F403
+from ._timings import *  # noqa: F401,F403
 from ._version import __version__
 from ._warnings import *  # noqa: F401,F403
+from ._writer import *  # noqa: F401,F403
 
 __all__ = [
     "__version__",
+    *_cache.__all__,
     *_config.__all__,
+    *_manifest.__all__,
     *_rapids_dependency_file_generator.__all__,
+    *_timings.__all__,
     *_warnings.__all__,
+    *_writer.__all__,
 ]
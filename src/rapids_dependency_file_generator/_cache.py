@@ -0,0 +1,187 @@
+"""On-disk cache of parsed ``dependencies.yaml`` files."""
+
+import dataclasses
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import typing
+import warnings
+from os import PathLike
+from pathlib import Path
+
+from ._version import __version__
+
+if typing.TYPE_CHECKING:
+    from ._config import Config
+
+__all__ = [
+    "ConfigCache",
+]
+
+DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".pickle"
+
+
+@functools.cache
+def _schema_digest() -> bytes:
+    import importlib.resources
+
+    return hashlib.sha256(importlib.resources.files(__package__).joinpath("schema.json").read_bytes()).digest()
+
+
+class ConfigCache:
+    """A content-addressed, on-disk cache of parsed ``dependencies.yaml`` files.
+
+    Entries are keyed on the contents of the configuration file, the version of
+    this tool, and the schema used for validation, so a cached entry is only
+    ever reused for a byte-identical file that has already been validated by the
+    same version of the generator. Entries are stored as pickles, so the cache
+    directory should only be writable by trusted users.
+
+    Parameters
+    ----------
+    directory : PathLike
+        The directory in which to store cache entries. It will be created if it
+        does not exist.
+    max_size : int
+        The maximum total size, in bytes, of all cache entries. When this is
+        exceeded, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: PathLike, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def key(self, contents: bytes) -> str:
+        """Compute the cache key for the contents of a configuration file.
+
+        Parameters
+        ----------
+        contents : bytes
+            The raw contents of the configuration file.
+
+        Returns
+        -------
+        str
+            The cache key.
+        """
+        digest = hashlib.sha256()
+        digest.update(__version__.encode())
+        digest.update(_schema_digest())
+        digest.update(contents)
+        return digest.hexdigest()
+
+    def _entry_path(self, contents: bytes) -> Path:
+        return self.directory / f"{self.key(contents)}{_ENTRY_SUFFIX}"
+
+    def get(self, contents: bytes, path: PathLike) -> typing.Union["Config", None]:
+        """Look up a parsed configuration file.
+
+        Parameters
+        ----------
+        contents : bytes
+            The raw contents of the configuration file.
+        path : PathLike
+            The path to the configuration file. This will be stored as the ``path``
+            attribute of the returned ``Config``.
+
+        Returns
+        -------
+        Config | None
+            The cached configuration, or ``None`` if there is no usable entry.
+        """
+        entry_path = self._entry_path(contents)
+        try:
+            with open(entry_path, "rb") as f:
+                config = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            # The cache only speeds things up, so an unusable cache directory is
+            # treated as a miss.
+            self._warn("reading from", e)
+            return None
+        except Exception:
+            # A truncated or otherwise unreadable entry is treated as a miss.
+            try:
+                entry_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+
+        # Mark the entry as recently used.
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return dataclasses.replace(config, path=Path(path))
+
+    def put(self, contents: bytes, config: "Config") -> None:
+        """Store a parsed configuration file.
+
+        Parameters
+        ----------
+        contents : bytes
+            The raw contents of the configuration file.
+        config : Config
+            The parsed and validated configuration.
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError as e:
+            self._warn("writing to", e)
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Concurrent writers of the same entry produce identical contents, so
+            # whichever rename happens last is as good as any other.
+            os.replace(tmp_path, self._entry_path(contents))
+        except BaseException as e:
+            try:
+                Path(tmp_path).unlink(missing_ok=True)
+            except OSError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            self._warn("writing to", e)
+            return
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+
+    def _entries(self) -> list[Path]:
+        try:
+            return [p for p in self.directory.iterdir() if p.suffix == _ENTRY_SUFFIX]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        entries = []
+        total_size = 0
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total_size += stat.st_size
+
+        for _, size, entry in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                entry.unlink(missing_ok=True)
+            except OSError:
+                continue
+            total_size -= size
+
+    def _warn(self, action: str, error: OSError) -> None:
+        warnings.warn(f"Not {action} the config cache in {self.directory}: {error}", RuntimeWarning, stacklevel=3)
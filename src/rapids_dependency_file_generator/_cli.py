@@ -1,16 +1,28 @@
 import argparse
+import concurrent.futures
+import contextlib
+import glob
+import json
 import os
+import sys
+import typing
 import warnings
+from pathlib import Path
 
 from . import DependencyFileGeneratorWarning
+from ._cache import DEFAULT_MAX_SIZE, ConfigCache
 from ._config import Output, load_config_from_file
 from ._constants import cli_name, default_dependency_file_path
+from ._manifest import MANIFEST_FILE_NAME, Manifest
 from ._rapids_dependency_file_generator import (
     delete_existing_files,
     make_dependency_files,
 )
 from ._rapids_dependency_file_validator import UnusedDependencySetWarning
+from ._timings import Timings, phase
 from ._version import __version__ as version
+from ._watch import watch
+from ._writer import FileWriter
 
 
 def validate_args(argv):
@@ -20,8 +32,14 @@ def validate_args(argv):
     parser.add_argument(
         "-c",
         "--config",
-        default=default_dependency_file_path,
-        help="Path to YAML config file.",
+        action="append",
+        default=None,
+        help=(
+            "Path to YAML config file. May be specified multiple times, as a glob pattern, or as "
+            "@FILE to read paths and glob patterns from FILE, one per line, to process several "
+            "config files in one process. Each config file is processed as if it was passed on "
+            f"its own, and with --jobs, several are processed in parallel. Defaults to {default_dependency_file_path}."
+        ),
     )
     parser.add_argument(
         "--clean",
@@ -35,6 +53,94 @@ def validate_args(argv):
         ),
     )
 
+    parser.add_argument(
+        "--clean-include",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help=(
+            "A glob pattern, relative to the path being cleaned, for files that --clean "
+            "may delete. May be specified multiple times. Defaults to all .txt and .yaml files. "
+            "Directories that are not searched by default, such as build directories and "
+            "virtual environments, are searched if a pattern names a path below them."
+        ),
+    )
+    parser.add_argument(
+        "--clean-exclude",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help=(
+            "A glob pattern, relative to the path being cleaned, for files or directories "
+            "that --clean should skip. May be specified multiple times."
+        ),
+    )
+
+    parser.add_argument(
+        "--manifest",
+        nargs="?",
+        default=None,
+        const="",
+        help=(
+            "Record the generated files in a manifest, delete files that are no longer "
+            "generated, and let --clean delete the recorded files instead of searching "
+            "for them. An optional path to the manifest may be provided, otherwise "
+            f"{MANIFEST_FILE_NAME} next to the config file is used."
+        ),
+    )
+
+    parser.add_argument(
+        "--incremental",
+        default=False,
+        action="store_true",
+        help=(
+            "Only generate files whose inputs in the config file (their file key, the "
+            "dependency sets they include, and channels) changed since they were recorded "
+            "in the manifest, or that were modified since. Implies --manifest."
+        ),
+    )
+
+    parser.add_argument(
+        "--watch",
+        default=False,
+        action="store_true",
+        help=(
+            "After generating the files, keep running and generate them again whenever "
+            "the config file or a modified pyproject.toml file changes. Only the files "
+            "affected by a change are generated again."
+        ),
+    )
+
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="How often --watch checks the files for changes. Defaults to 0.5.",
+    )
+
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help=(
+            "Run a server listening on the Unix socket SOCKET that generates files for "
+            "clients using --server, keeping parsed config files in memory. Runs until "
+            "interrupted."
+        ),
+    )
+
+    parser.add_argument(
+        "--server",
+        metavar="SOCKET",
+        default=os.environ.get("RAPIDS_DEPENDENCY_FILE_GENERATOR_SERVER"),
+        help=(
+            "Send the request to a server started with --serve listening on the Unix "
+            "socket SOCKET, if one is running. Otherwise, or if options the server does "
+            "not support are used, files are generated by this process. Defaults to the "
+            "value of the RAPIDS_DEPENDENCY_FILE_GENERATOR_SERVER environment variable."
+        ),
+    )
+
     codependent_args = parser.add_argument_group("optional, but codependent")
     codependent_args.add_argument(
         "--file-key",
@@ -69,6 +175,69 @@ def validate_args(argv):
         ),
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Number of worker processes to use to generate files in parallel. Use 0 for "
+            "one worker per CPU. Ignored when writing to stdout. Defaults to 1."
+        ),
+    )
+
+    parser.add_argument(
+        "--write-if-changed",
+        default=False,
+        action="store_true",
+        help=(
+            "Only write files whose contents have changed, leaving the modification "
+            "times of unchanged files alone, and report how many files were written."
+        ),
+    )
+
+    parser.add_argument(
+        "--all-or-nothing",
+        default=False,
+        action="store_true",
+        help=(
+            "If any file fails to generate, leave every file untouched instead of "
+            "writing the files that were generated successfully."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("RAPIDS_DEPENDENCY_FILE_GENERATOR_CACHE_DIR"),
+        help=(
+            "Directory in which to cache parsed and validated config files, so that "
+            "repeated runs against an unchanged config file skip parsing and validation. "
+            "Defaults to the value of the RAPIDS_DEPENDENCY_FILE_GENERATOR_CACHE_DIR "
+            "environment variable. If neither is set, no cache is used."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help=(
+            "Maximum total size of the cache in bytes. When it is exceeded, the least "
+            f"recently used entries are evicted. Defaults to {DEFAULT_MAX_SIZE}."
+        ),
+    )
+
+    parser.add_argument(
+        "--skip-validation",
+        default=False,
+        action="store_true",
+        help=(
+            "Do not validate the config file against the schema. This is only safe for "
+            "config files that are already known to be valid, and also disables warnings "
+            "about the contents of the config file."
+        ),
+    )
+
     parser.add_argument(
         "--version",
         default=False,
@@ -97,6 +266,44 @@ def validate_args(argv):
         help="Treat warnings as errors.",
     )
 
+    parser.add_argument(
+        "--timings",
+        default=False,
+        action="store_true",
+        help=(
+            "Print the time spent in each phase of generation, by file key and output type, "
+            "together with counters of the work done, to stderr. Work done by --jobs worker "
+            "processes is not included."
+        ),
+    )
+
+    parser.add_argument(
+        "--timings-json",
+        metavar="PATH",
+        help="Write the timings reported by --timings to PATH as JSON.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help=(
+            "Profile the run and write the profile to PATH. With cProfile, the profile is a "
+            "pstats file that can be read with 'python -m pstats PATH' or tools like snakeviz. "
+            "With pyinstrument, it is a session file that can be read with "
+            "'pyinstrument --load PATH'."
+        ),
+    )
+
+    parser.add_argument(
+        "--profiler",
+        choices=["auto", "cprofile", "pyinstrument"],
+        default="auto",
+        help=(
+            "Profiler to use with --profile. 'auto' uses the pyinstrument sampling profiler if "
+            "it is installed, and cProfile otherwise. Defaults to 'auto'."
+        ),
+    )
+
     args = parser.parse_args(argv)
 
     dependent_arg_keys = ["file_key", "output", "matrix"]
@@ -107,14 +314,92 @@ def validate_args(argv):
             + "".join([f"\n  {x}" for x in ["--file-key", "--output", "--matrix"]])
         )
 
+    if args.watch and not all(dependent_arg_values):
+        raise ValueError("--watch cannot be used with --file-key, --output and --matrix")
+
+    if args.jobs < 0:
+        raise ValueError("--jobs must not be negative")
+
     if args.prepend_channels and args.output and args.output != Output.CONDA.value:
         raise ValueError(f"--prepend-channel is only valid with --output {Output.CONDA.value}")
 
+    args.configs = expand_config_paths(args.config or [default_dependency_file_path])
+    args.batch = len(args.configs) > 1
+    if not args.batch:
+        return for_config(args, args.configs[0])
+
+    if not all(dependent_arg_values):
+        raise ValueError("--file-key, --output and --matrix cannot be used with multiple config files")
+    if args.watch:
+        raise ValueError("--watch cannot be used with multiple config files")
+    if args.clean:
+        raise ValueError("--clean cannot be given a path when using multiple config files")
+    if args.manifest:
+        raise ValueError("--manifest cannot be given a path when using multiple config files")
+    args.config = None
+    return args
+
+
+def expand_config_paths(values: list[str]) -> list[str]:
+    """Expand the values of ``--config`` into a list of config files.
+
+    Parameters
+    ----------
+    values : list[str]
+        The values of ``--config``. Each one is either a path, a glob pattern, or
+        ``@FILE`` to read paths and glob patterns from ``FILE``, one per line.
+        Empty lines and lines starting with ``#`` are ignored, and relative
+        paths are relative to the directory containing ``FILE``.
+
+    Returns
+    -------
+    list[str]
+        The paths of the config files, in the order they were given, without
+        duplicates.
+
+    Raises
+    ------
+    ValueError
+        If a glob pattern does not match any file.
+    """
+    patterns = []
+    for value in values:
+        if value.startswith("@"):
+            list_file = value[1:]
+            with open(list_file) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        patterns.append(os.path.join(os.path.dirname(list_file), line))
+        else:
+            patterns.append(value)
+
+    paths: dict[str, None] = {}
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                raise ValueError(f"No config files match {pattern!r}")
+            paths.update(dict.fromkeys(matches))
+        else:
+            paths[pattern] = None
+    return list(paths)
+
+
+def for_config(args: argparse.Namespace, config: str) -> argparse.Namespace:
+    """Return a copy of the arguments for processing a single config file."""
+    args = argparse.Namespace(**vars(args))
+    args.config = config
+    args.configs = [config]
+
     # If --clean was passed without arguments, default to cleaning from the root of the
     # tree where the config file is.
     if args.clean == "":
         args.clean = os.path.dirname(os.path.abspath(args.config))
 
+    if args.manifest == "" or (args.incremental and args.manifest is None):
+        args.manifest = os.path.join(os.path.dirname(os.path.abspath(args.config)), MANIFEST_FILE_NAME)
+
     return args
 
 
@@ -128,9 +413,55 @@ def generate_matrix(matrix_arg):
     return matrix
 
 
+def profile(function: typing.Callable[[], None], path: str, profiler: str) -> None:
+    """Call a function under a profiler, and write the profile to a file.
+
+    Parameters
+    ----------
+    function : Callable[[], None]
+        The function to profile.
+    path : str
+        The path of the file to write the profile to.
+    profiler : str
+        The profiler to use: ``"cprofile"``, ``"pyinstrument"``, or ``"auto"``
+        to use pyinstrument if it is installed, and cProfile otherwise.
+    """
+    if profiler in ("auto", "pyinstrument"):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            if profiler == "pyinstrument":
+                raise
+        else:
+            sampling_profiler = Profiler()
+            sampling_profiler.start()
+            try:
+                function()
+            finally:
+                sampling_profiler.stop().save(path)
+                print(f"Profile written to {path}, view it with 'pyinstrument --load {path}'", file=sys.stderr)
+            return
+
+    import cProfile
+
+    deterministic_profiler = cProfile.Profile()
+    try:
+        deterministic_profiler.runcall(function)
+    finally:
+        deterministic_profiler.dump_stats(path)
+        print(f"Profile written to {path}, view it with 'python -m pstats {path}'", file=sys.stderr)
+
+
 def main(argv=None) -> None:
     args = validate_args(argv)
 
+    if args.profile:
+        profile(lambda: run(args), args.profile, args.profiler)
+    else:
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
     if args.version:
         print(f"{cli_name}, version {version}")
         return
@@ -140,26 +471,188 @@ def main(argv=None) -> None:
     if not args.warn_unused_dependencies and not args.warn_all:
         warnings.simplefilter("ignore", category=UnusedDependencySetWarning)
 
-    parsed_config = load_config_from_file(args.config)
+    if args.serve:
+        from ._server import DependencyFileServer
+
+        with DependencyFileServer(args.serve) as server:
+            print(f"Listening on {args.serve}. Press Ctrl+C to stop.", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return
+
+    if len(args.configs) > 1:
+        run_batch(args)
+        return
+
+    timings = Timings() if args.timings or args.timings_json else None
+
+    if args.server and not (
+        args.clean or args.clean_include or args.clean_exclude or args.manifest or args.watch or timings or args.profile
+    ):
+        from ._server import query
+
+        to_stdout = all([args.file_key, args.output, args.matrix is not None])
+        try:
+            response = query(
+                args.server,
+                {
+                    "config": os.path.abspath(args.config),
+                    "file_keys": args.file_key,
+                    "output": [args.output] if to_stdout else None,
+                    "matrix": generate_matrix(args.matrix),
+                    "prepend_channels": args.prepend_channels,
+                    "to_stdout": to_stdout,
+                    "write_if_changed": args.write_if_changed,
+                    "all_or_nothing": args.all_or_nothing,
+                    "validate": not args.skip_validation,
+                    "cache_dir": os.path.abspath(args.cache_dir) if args.cache_dir else None,
+                    "cache_max_size": args.cache_max_size,
+                    "jobs": args.jobs,
+                },
+            )
+        except (FileNotFoundError, ConnectionRefusedError):
+            # No server is running.
+            pass
+        else:
+            sys.stdout.write(response["stdout"])
+            sys.stderr.write(response["stderr"])
+            return
+
+    # Only the initial generation is timed, not the regenerations done by --watch.
+    with timings.activate() if timings else contextlib.nullcontext(), phase("total"):
+        cache = ConfigCache(args.cache_dir, max_size=args.cache_max_size) if args.cache_dir else None
+        parsed_config = load_config_from_file(args.config, cache=cache, validate=not args.skip_validation)
+
+        matrix = generate_matrix(args.matrix)
+        to_stdout = all([args.file_key, args.output, args.matrix is not None])
+
+        if to_stdout:
+            file_keys = args.file_key
+            output = {Output(args.output)}
+        else:
+            file_keys = list(parsed_config.files.keys())
+            output = None
 
-    matrix = generate_matrix(args.matrix)
-    to_stdout = all([args.file_key, args.output, args.matrix is not None])
+        manifest = Manifest.load(args.manifest) if args.manifest and not to_stdout else None
+        if args.watch and manifest is None:
+            # Watching only generates the files affected by each change, which
+            # requires knowing what was generated from what.
+            manifest = Manifest(None)
 
-    if to_stdout:
-        file_keys = args.file_key
-        output = {Output(args.output)}
+        if args.clean:
+            with phase("clean"):
+                # A missing, incompatible or corrupt manifest has no entries, so the
+                # generated files are searched for instead.
+                if manifest is not None and manifest.entries:
+                    manifest.delete_outputs(args.clean)
+                else:
+                    delete_existing_files(args.clean, include=args.clean_include, exclude=args.clean_exclude)
+
+        def generate(incremental: bool) -> None:
+            writer = FileWriter(write_if_changed=args.write_if_changed, all_or_nothing=args.all_or_nothing)
+
+            make_dependency_files(
+                parsed_config=parsed_config,
+                file_keys=file_keys,
+                output=output,
+                matrix=matrix,
+                prepend_channels=args.prepend_channels,
+                to_stdout=to_stdout,
+                max_workers=args.jobs or None,
+                writer=writer,
+                manifest=manifest,
+                incremental=incremental,
+            )
+
+            if (args.write_if_changed or args.watch) and not to_stdout:
+                prefix = f"{args.config}: " if args.batch else ""
+                print(f"{prefix}{writer.written} files written, {writer.unchanged} unchanged", file=sys.stderr)
+
+        generate(incremental=args.incremental and manifest is not None)
+
+    if timings:
+        report_timings(args, timings)
+
+    if not args.watch:
+        return
+
+    assert manifest is not None
+    config_contents = Path(args.config).read_bytes()
+
+    def watched_paths() -> list[str]:
+        pyproject_files = [
+            file_path for file_path, entry in manifest.entries.items() if entry.output == Output.PYPROJECT
+        ]
+        return [args.config, *pyproject_files]
+
+    def on_change() -> None:
+        nonlocal config_contents, parsed_config, file_keys
+        contents = Path(args.config).read_bytes()
+        if contents != config_contents:
+            parsed_config = load_config_from_file(args.config, cache=cache, validate=not args.skip_validation)
+            file_keys = list(parsed_config.files.keys())
+            config_contents = contents
+        generate(incremental=True)
+
+    print(f"Watching {args.config} for changes. Press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        watch(watched_paths, on_change, interval=args.watch_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    # Process each config file as if it was passed on its own. Config files are
+    # processed in this process, or in worker processes with --jobs, so that the
+    # imports, the schema validator and the YAML loader are shared by all of them.
+    # Failures are collected and reported together once all config files have
+    # been processed.
+    timings = Timings() if args.timings or args.timings_json else None
+    all_config_args = [
+        argparse.Namespace(
+            **{
+                **vars(for_config(args, config)),
+                "jobs": 1,
+                "server": None,
+                "timings": False,
+                "timings_json": None,
+            }
+        )
+        for config in args.configs
+    ]
+
+    errors: list[tuple[str, BaseException]] = []
+    if args.jobs == 1:
+        with timings.activate() if timings else contextlib.nullcontext():
+            for config_args in all_config_args:
+                try:
+                    run(config_args)
+                except Exception as e:
+                    errors.append((config_args.config, e))
     else:
-        file_keys = list(parsed_config.files.keys())
-        output = None
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs or None) as executor:
+            futures = [executor.submit(run, config_args) for config_args in all_config_args]
+            for config_args, future in zip(all_config_args, futures):
+                exception = future.exception()
+                if exception is not None:
+                    errors.append((config_args.config, exception))
 
-    if args.clean:
-        delete_existing_files(args.clean)
+    if timings:
+        report_timings(args, timings)
 
-    make_dependency_files(
-        parsed_config=parsed_config,
-        file_keys=file_keys,
-        output=output,
-        matrix=matrix,
-        prepend_channels=args.prepend_channels,
-        to_stdout=to_stdout,
-    )
+    if errors:
+        raise ValueError(
+            f"{len(errors)} of {len(all_config_args)} config files could not be processed:"
+            + "".join(f"\n - {config}: {type(e).__name__}: {e}" for config, e in errors)
+        ) from errors[0][1]
+
+
+def report_timings(args: argparse.Namespace, timings: Timings) -> None:
+    if args.timings:
+        print(timings.summary(), file=sys.stderr)
+    if args.timings_json:
+        with open(args.timings_json, "w") as f:
+            json.dump(timings.to_dict(), f, indent=2)
+            f.write("\n")
@@ -1,13 +1,15 @@
+import fnmatch
+import os
+import re
 import typing
 from dataclasses import dataclass, field
 from enum import Enum
 from os import PathLike
 from pathlib import Path
 
-import yaml
-
-from . import _constants
-from ._rapids_dependency_file_validator import validate_dependencies
+from . import _constants, _timings, _yaml
+from ._cache import ConfigCache
+from ._rapids_dependency_file_validator import validate_dependencies, warn_unused_dependency_sets
 
 __all__ = [
     "Output",
@@ -110,6 +112,70 @@ class MatrixMatcher:
     """The list of packages for this entry."""
 
 
+def _is_glob(pattern: str) -> bool:
+    return any(c in pattern for c in "*?[")
+
+
+class _MatrixIndex:
+    """An index for finding the matrix matcher to use for a matrix combination.
+
+    Matchers whose values are all literal strings are stored in hash tables keyed
+    by the set of matrix keys they constrain, so finding them takes one lookup per
+    distinct set of keys. Only matchers containing glob patterns are checked one
+    by one, against regular expressions compiled when the index is built.
+    """
+
+    def __init__(self, matchers: list[MatrixMatcher]):
+        self.matchers = matchers
+        self.fallback: typing.Union[MatrixMatcher, None] = None
+        self.exact: dict[tuple[str, ...], dict[tuple[str, ...], int]] = {}
+        self.globs: list[tuple[int, list[tuple[str, typing.Callable[[str], typing.Any]]]]] = []
+
+        for i, matcher in enumerate(matchers):
+            # An empty matrix is the fallback used when nothing else matches. If
+            # there are several, the last one is used.
+            if not matcher.matrix:
+                self.fallback = matcher
+                continue
+
+            keys = tuple(sorted(matcher.matrix))
+            patterns = tuple(os.path.normcase(matcher.matrix[key]) for key in keys)
+            if any(_is_glob(pattern) for pattern in patterns):
+                self.globs.append(
+                    (i, [(key, re.compile(fnmatch.translate(pattern)).match) for key, pattern in zip(keys, patterns)])
+                )
+            else:
+                # Earlier matchers take precedence over later duplicates.
+                self.exact.setdefault(keys, {}).setdefault(patterns, i)
+
+    def match(self, matrix_combo: dict[str, str]) -> typing.Union[MatrixMatcher, None]:
+        best = len(self.matchers)
+        for keys, table in self.exact.items():
+            values = []
+            for key in keys:
+                value = matrix_combo.get(key)
+                if not value:
+                    break
+                values.append(os.path.normcase(value))
+            else:
+                best = min(best, table.get(tuple(values), best))
+
+        globs_evaluated = 0
+        for i, patterns in self.globs:
+            if i >= best:
+                break
+            globs_evaluated += 1
+            if all((value := matrix_combo.get(key)) and match(os.path.normcase(value)) for key, match in patterns):
+                best = i
+                break
+        if globs_evaluated:
+            _timings.count("glob_matches", globs_evaluated)
+
+        if best < len(self.matchers):
+            return self.matchers[best]
+        return self.fallback
+
+
 @dataclass
 class SpecificDependencies:
     """A dependency entry in the ``specific`` field of a dependency set."""
@@ -120,6 +186,36 @@ class SpecificDependencies:
     matrices: list[MatrixMatcher]
     """The list of matrix matchers for this entry."""
 
+    _index: _MatrixIndex = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._index = _MatrixIndex(self.matrices)
+
+    def match(self, matrix_combo: dict[str, str]) -> typing.Union[MatrixMatcher, None]:
+        """Find the matrix matcher to use for a matrix combination.
+
+        The first matcher in ``matrices`` whose matrix is compatible with
+        ``matrix_combo`` is used. A matcher is compatible if, for every key in its
+        matrix, ``matrix_combo`` has a value for that key which matches the
+        matcher's glob pattern. If no matcher is compatible, the matcher with an
+        empty matrix is used as a fallback, if there is one.
+
+        The matchers are indexed when this entry is created, so ``matrices``
+        should not be modified afterwards.
+
+        Parameters
+        ----------
+        matrix_combo : dict[str, str]
+            A mapping from matrix keys to values for the file being generated.
+
+        Returns
+        -------
+        MatrixMatcher | None
+            The matcher to use, or ``None`` if there is no compatible matcher
+            and no fallback.
+        """
+        return self._index.match(matrix_combo)
+
 
 @dataclass
 class Dependencies:
@@ -224,7 +320,29 @@ def _parse_channels(channels) -> list[str]:
     return list(channels)
 
 
-def parse_config(config: dict[str, typing.Any], path: PathLike) -> Config:
+def _validate_semantics(config: Config) -> None:
+    # Checks that cannot be expressed in the schema. These only depend on the
+    # config itself, so they are done once here rather than while generating.
+    errors = []
+    for name, dependency_set in config.dependencies.items():
+        for specific_entry in dependency_set.specific:
+            num_unique = len({frozenset(matcher.matrix.items()) for matcher in specific_entry.matrices})
+            if num_unique != len(specific_entry.matrices):
+                err = f"All matrix entries must be unique. Found duplicates in '{name}':"
+                for matcher in specific_entry.matrices:
+                    err += f"\n - {matcher.matrix}"
+                errors.append(err)
+
+    if errors:
+        raise ValueError("\n".join(errors))
+
+
+@_timings.phase("yaml")
+def _load_yaml(contents: bytes) -> typing.Any:
+    return _yaml.load(contents)
+
+
+def parse_config(config: dict[str, typing.Any], path: PathLike, *, validate: bool = True) -> Config:
     """Parse a configuration file from a dictionary.
 
     Parameters
@@ -234,6 +352,10 @@ def parse_config(config: dict[str, typing.Any], path: PathLike) -> Config:
     path : PathLike
         The path to the parsed configuration file. This will be stored as the ``path``
         attribute.
+    validate : bool
+        Whether to validate ``config`` against the schema before parsing it. This
+        should only be disabled for configuration files that are already known to
+        be valid.
 
     Returns
     -------
@@ -244,28 +366,65 @@ def parse_config(config: dict[str, typing.Any], path: PathLike) -> Config:
     ------
     jsonschema.exceptions.ValidationError
         If the dependencies do not conform to the schema
+    ValueError
+        If the dependencies conform to the schema but are otherwise invalid.
     """
-    validate_dependencies(config)
-    return Config(
-        path=Path(path),
-        files={key: _parse_file(value) for key, value in config["files"].items()},
-        channels=_parse_channels(config.get("channels", [])),
-        dependencies={key: _parse_dependencies(value) for key, value in config["dependencies"].items()},
-    )
-
-
-def load_config_from_file(path: PathLike) -> Config:
+    if validate:
+        validate_dependencies(config)
+    with _timings.phase("parse"):
+        parsed_config = Config(
+            path=Path(path),
+            files={key: _parse_file(value) for key, value in config["files"].items()},
+            channels=_parse_channels(config.get("channels", [])),
+            dependencies={key: _parse_dependencies(value) for key, value in config["dependencies"].items()},
+        )
+        _validate_semantics(parsed_config)
+    return parsed_config
+
+
+@_timings.phase("load_config")
+def load_config_from_file(
+    path: PathLike,
+    *,
+    cache: typing.Union[ConfigCache, None] = None,
+    validate: bool = True,
+) -> Config:
     """Open a ``dependencies.yaml`` file and parse it.
 
     Parameters
     ----------
     path : PathLike
         The path to the configuration file to parse.
+    cache : ConfigCache | None
+        An optional cache of previously parsed configuration files. If the file
+        has been parsed before, YAML parsing and schema validation are skipped.
+    validate : bool
+        Whether to validate the file against the schema before parsing it. Files
+        that are parsed without validation are not added to ``cache``.
 
     Returns
     -------
     Config
         The fully parsed configuration file.
     """
-    with open(path) as f:
-        return parse_config(yaml.safe_load(f), path)
+    with _timings.phase("read"), open(path, "rb") as f:
+        contents = f.read()
+
+    if cache is None:
+        return parse_config(_load_yaml(contents), path, validate=validate)
+
+    with _timings.phase("cache"):
+        parsed_config = cache.get(contents, path)
+    if parsed_config is not None:
+        if validate:
+            warn_unused_dependency_sets(
+                parsed_config.dependencies.keys(),
+                (i for file_config in parsed_config.files.values() for i in file_config.includes),
+            )
+        return parsed_config
+
+    parsed_config = parse_config(_load_yaml(contents), path, validate=validate)
+    if validate:
+        with _timings.phase("cache"):
+            cache.put(contents, parsed_config)
+    return parsed_config
@@ -1,5 +1,7 @@
 cli_name = "rapids-dependency-file-generator"
 
+generated_file_header = f"# This file is generated by `{cli_name}`."
+
 default_channels = [
     "rapidsai",
     "rapidsai-nightly",
@@ -0,0 +1,336 @@
+"""Manifest of the files generated from a ``dependencies.yaml`` file."""
+
+import dataclasses
+import enum
+import hashlib
+import json
+import os
+import typing
+import warnings
+from dataclasses import dataclass, field
+from os import PathLike
+from pathlib import Path
+
+from . import _config
+from ._version import __version__
+from ._writer import FileWriter, is_generated_file
+
+__all__ = [
+    "InputGraph",
+    "Manifest",
+]
+
+MANIFEST_FILE_NAME = ".dfg-manifest.json"
+
+_MANIFEST_VERSION = 1
+
+
+def _content_hash(contents: str) -> str:
+    return hashlib.sha256(contents.encode()).hexdigest()
+
+
+def _canonical(value: typing.Any) -> typing.Any:
+    # Convert parsed config objects to JSON values that do not depend on set
+    # iteration order, which differs between processes.
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _canonical(getattr(value, f.name)) for f in dataclasses.fields(value) if f.compare}
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, PathLike):
+        return Path(value).as_posix()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=json.dumps)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def _node_hash(value: typing.Any) -> str:
+    data = json.dumps([__version__, _canonical(value)], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class InputGraph:
+    """The parts of a config that each generated file is read from.
+
+    Each generated file depends on its entry in ``files``, the dependency sets
+    it includes and, for Conda environment files, the list of channels. The
+    content hashes of these nodes tell whether a file needs to be generated
+    again after the config changes.
+
+    Parameters
+    ----------
+    parsed_config : Config
+        The parsed dependencies.yaml config file.
+    conda_channels : list[str]
+        The channels written to Conda environment files, including prepended ones.
+    """
+
+    def __init__(self, parsed_config: _config.Config, conda_channels: list[str]):
+        self.parsed_config = parsed_config
+        self.conda_channels = conda_channels
+        self._hashes: dict[str, str] = {}
+
+    def _hash(self, node: str, value: typing.Any) -> str:
+        try:
+            return self._hashes[node]
+        except KeyError:
+            digest = self._hashes[node] = _node_hash(value)
+            return digest
+
+    def inputs(self, file_key: str, file_type: _config.Output, matrix_combo: dict[str, str]) -> dict[str, str]:
+        """Get the content hashes of the inputs of a generated file.
+
+        Parameters
+        ----------
+        file_key : str
+            The file key the file is generated from.
+        file_type : Output
+            The type of the file.
+        matrix_combo : dict[str, str]
+            The matrix combination the file is generated for.
+
+        Returns
+        -------
+        dict[str, str]
+            The content hash of each input, keyed by the name of the input.
+        """
+        file_config = self.parsed_config.files[file_key]
+        inputs = {
+            f"files.{file_key}": self._hash(f"files.{file_key}", file_config),
+            "matrix": _node_hash(matrix_combo),
+        }
+        for include in file_config.includes:
+            inputs[f"dependencies.{include}"] = self._hash(
+                f"dependencies.{include}", self.parsed_config.dependencies.get(include)
+            )
+        if file_type == _config.Output.CONDA:
+            inputs["channels"] = self._hash("channels", self.conda_channels)
+        return inputs
+
+
+def _normalize(file_path: typing.Union[str, PathLike]) -> str:
+    return os.path.normpath(os.path.abspath(file_path))
+
+
+@dataclass
+class ManifestEntry:
+    """A generated file recorded in a manifest."""
+
+    file_key: str
+    """The file key the file was generated from."""
+
+    output: _config.Output
+    """The type of the file."""
+
+    sha256: str
+    """The SHA-256 hash of the generated contents of the file."""
+
+    inputs: dict[str, str] = field(default_factory=dict)
+    """The content hashes of the inputs the file was generated from."""
+
+
+class Manifest:
+    """A record of the files generated from a ``dependencies.yaml`` file.
+
+    The manifest lists every file written by :func:`make_dependency_files`, so
+    that generated files can be found without searching the directory tree for
+    them. Paths are stored relative to the directory containing the manifest.
+
+    Parameters
+    ----------
+    path : PathLike | None
+        The path of the manifest file, or None for a manifest that is only kept
+        in memory.
+    """
+
+    def __init__(self, path: typing.Union[PathLike, None]):
+        self.path = Path(path) if path is not None else None
+        self.entries: dict[str, ManifestEntry] = {}
+        """The recorded files, keyed by their absolute, normalized path."""
+
+    @classmethod
+    def load(cls, path: PathLike) -> "Manifest":
+        """Read a manifest file.
+
+        Parameters
+        ----------
+        path : PathLike
+            The path of the manifest file. If it does not exist, was written by an
+            incompatible version of this tool, or is corrupt, an empty manifest is
+            returned, so that every file is generated again. A corrupt manifest
+            also issues a warning.
+
+        Returns
+        -------
+        Manifest
+            The manifest.
+        """
+        manifest = cls(path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return manifest
+        except ValueError as e:
+            # json.JSONDecodeError, or a file that is not valid UTF-8.
+            return cls._corrupt(path, e)
+
+        try:
+            if data.get("version") != _MANIFEST_VERSION:
+                return manifest
+
+            for relpath, entry in data["files"].items():
+                manifest.entries[_normalize(Path(path).parent / relpath)] = ManifestEntry(
+                    file_key=entry["file_key"],
+                    output=_config.Output(entry["output"]),
+                    sha256=entry["sha256"],
+                    inputs=dict(entry.get("inputs", {})),
+                )
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            # The manifest is derived state, so a hand-edited file or one with merge
+            # conflicts is ignored, like a corrupt ConfigCache entry.
+            return cls._corrupt(path, e)
+        return manifest
+
+    @classmethod
+    def _corrupt(cls, path: PathLike, error: Exception) -> "Manifest":
+        warnings.warn(
+            f"Ignoring corrupt manifest {path} ({type(error).__name__}: {error}); all files will be generated again",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        return cls(path)
+
+    def save(self) -> None:
+        """Write the manifest file, unless it is only kept in memory."""
+        if self.path is None:
+            return
+        base = _normalize(self.path.parent)
+        files = {
+            Path(os.path.relpath(file_path, base)).as_posix(): {
+                "file_key": entry.file_key,
+                "output": entry.output.value,
+                "sha256": entry.sha256,
+                "inputs": entry.inputs,
+            }
+            for file_path, entry in self.entries.items()
+        }
+        data = {
+            "version": _MANIFEST_VERSION,
+            "generator_version": __version__,
+            "files": dict(sorted(files.items())),
+        }
+        writer = FileWriter(write_if_changed=True)
+        writer.write(str(self.path), json.dumps(data, indent=2) + "\n")
+        writer.commit()
+
+    def record(
+        self,
+        file_path: typing.Union[str, PathLike],
+        file_key: str,
+        output: _config.Output,
+        contents: str,
+        inputs: typing.Union[dict[str, str], None] = None,
+    ) -> None:
+        """Record a generated file.
+
+        Parameters
+        ----------
+        file_path : str | PathLike
+            The path of the file.
+        file_key : str
+            The file key the file was generated from.
+        output : Output
+            The type of the file.
+        contents : str
+            The generated contents of the file.
+        inputs : dict[str, str] | None
+            The content hashes of the inputs the file was generated from, as
+            returned by :meth:`InputGraph.inputs`.
+        """
+        self.entries[_normalize(file_path)] = ManifestEntry(
+            file_key=file_key, output=output, sha256=_content_hash(contents), inputs=inputs or {}
+        )
+
+    def is_up_to_date(
+        self,
+        file_path: typing.Union[str, PathLike],
+        file_key: str,
+        output: _config.Output,
+        inputs: dict[str, str],
+    ) -> bool:
+        """Check whether a file needs to be generated again.
+
+        Parameters
+        ----------
+        file_path : str | PathLike
+            The path of the file.
+        file_key : str
+            The file key the file is generated from.
+        output : Output
+            The type of the file.
+        inputs : dict[str, str]
+            The current content hashes of the inputs of the file.
+
+        Returns
+        -------
+        bool
+            True if the file was last generated from the same inputs and has not
+            been modified or deleted since.
+        """
+        entry = self.entries.get(_normalize(file_path))
+        if entry is None or (entry.file_key, entry.output, entry.inputs) != (file_key, output, inputs):
+            return False
+        try:
+            with open(file_path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest() == entry.sha256
+        except OSError:
+            return False
+
+    def _forget(self, file_path: str) -> None:
+        entry = self.entries.pop(file_path)
+        # pyproject.toml files are modified in place rather than generated, so
+        # they are never deleted. Files that no longer have the generated file
+        # header have been taken over by someone else and are left alone too.
+        if entry.output != _config.Output.PYPROJECT and is_generated_file(file_path):
+            os.remove(file_path)
+
+    def delete_outputs(self, root: typing.Union[str, PathLike, None] = None) -> None:
+        """Delete the generated files recorded in the manifest.
+
+        Parameters
+        ----------
+        root : str | PathLike | None
+            If given, only files below this directory are deleted.
+        """
+        normalized_root = _normalize(root) if root is not None else None
+        for file_path in list(self.entries):
+            if normalized_root is None or os.path.commonpath([normalized_root, file_path]) == normalized_root:
+                self._forget(file_path)
+
+    def delete_orphans(
+        self,
+        parsed_config: _config.Config,
+        file_keys: typing.Collection[str],
+        generated: typing.Collection[str],
+    ) -> None:
+        """Delete files that a regeneration no longer produces.
+
+        Parameters
+        ----------
+        parsed_config : Config
+            The parsed dependencies.yaml config file.
+        file_keys : Collection[str]
+            The file keys that were fully regenerated.
+        generated : Collection[str]
+            The paths of the files that were generated.
+        """
+        generated_paths = {_normalize(file_path) for file_path in generated}
+        for file_path, entry in list(self.entries.items()):
+            if file_path not in generated_paths and (
+                entry.file_key in file_keys or entry.file_key not in parsed_config.files
+            ):
+                self._forget(file_path)
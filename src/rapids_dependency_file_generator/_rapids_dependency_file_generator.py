@@ -1,43 +1,165 @@
+import concurrent.futures
 import fnmatch
 import itertools
 import os
 import textwrap
 import typing
 from collections.abc import Generator
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-import tomlkit
-import yaml
+from . import _config, _timings, _toml, _yaml
+from ._constants import cli_name, generated_file_header
+from ._manifest import InputGraph, Manifest
+from ._writer import FileWriter, is_generated_file
 
-from . import _config
-from ._constants import cli_name
+if typing.TYPE_CHECKING:
+    import tomlkit
 
 __all__ = [
+    "DependencyResolver",
+    "GeneratedFile",
+    "ResolvedDeps",
+    "generate",
     "make_dependency_files",
+    "resolve_dependencies",
 ]
 
-HEADER = f"# This file is generated by `{cli_name}`."
-
-
-def delete_existing_files(root: str) -> None:
+HEADER = generated_file_header
+
+# Directories that usually do not contain generated files but can be very large. They
+# are only searched when an include pattern reaches into them.
+_SKIPPED_DIRS = frozenset(
+    {
+        ".eggs",
+        ".git",
+        ".hg",
+        ".mypy_cache",
+        ".nox",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".svn",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "_skbuild",
+        "build",
+        "dist",
+        "node_modules",
+        "venv",
+    }
+)
+
+# Files marking a directory as a conda environment or virtual environment, which is
+# skipped along with everything below it unless an include pattern reaches into it.
+_ENVIRONMENT_MARKERS = frozenset({"conda-meta", "pyvenv.cfg"})
+
+
+def delete_existing_files(
+    root: str,
+    *,
+    include: typing.Union[typing.Sequence[str], None] = None,
+    exclude: typing.Union[typing.Sequence[str], None] = None,
+) -> None:
     """Delete any files generated by this generator.
 
     This function can be used to clean up a directory tree before generating a new set
-    of files from scratch.
+    of files from scratch. Version control directories, build directories, caches,
+    and conda or virtual environments are not searched, unless an include pattern
+    names a path below them.
 
     Parameters
     ----------
     root : str
         The path (relative or absolute) to the root of the directory tree to search for files to delete.
+    include : Sequence[str] | None
+        Glob patterns for the paths of files to consider for deletion, relative to
+        ``root``. If None, all ``.txt`` and ``.yaml`` files are considered. A
+        directory that is not searched by default, such as ``build``, is searched
+        if the leading components of a pattern match its path, as in
+        ``build/**/*.txt``.
+    exclude : Sequence[str] | None
+        Glob patterns for the paths of files or directories to skip, relative to
+        ``root``.
     """
-    for dirpath, _, filenames in os.walk(root):
-        for fn in filter(lambda fn: fn.endswith(".txt") or fn.endswith(".yaml"), filenames):
-            with open(file_path := os.path.join(dirpath, fn)) as f:
-                try:
-                    if HEADER in f.read():
-                        os.remove(file_path)
-                except UnicodeDecodeError:
-                    pass
+
+    def matches(relpath: str, patterns: typing.Sequence[str]) -> bool:
+        return any(fnmatch.fnmatch(relpath, pattern) for pattern in patterns)
+
+    def included_below(reldirpath: str) -> bool:
+        # Whether an include pattern names a path below the directory.
+        parts = reldirpath.split("/")
+        for pattern in include or ():
+            pattern_parts = pattern.split("/")
+            if len(pattern_parts) > len(parts) and all(map(fnmatch.fnmatch, parts, pattern_parts)):
+                return True
+        return False
+
+    stack = [(root, "")]
+    while stack:
+        dirpath, reldirpath = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        if (
+            reldirpath
+            and any(entry.name in _ENVIRONMENT_MARKERS for entry in entries)
+            and not included_below(reldirpath.rstrip("/"))
+        ):
+            continue
+
+        for entry in entries:
+            relpath = f"{reldirpath}{entry.name}"
+            if entry.is_dir():
+                # Like os.walk, do not follow symlinks to directories.
+                if (
+                    not entry.is_symlink()
+                    and (entry.name not in _SKIPPED_DIRS or included_below(relpath))
+                    and not (exclude and matches(relpath, exclude))
+                ):
+                    stack.append((entry.path, f"{relpath}/"))
+            elif (
+                (matches(relpath, include) if include is not None else entry.name.endswith((".txt", ".yaml")))
+                and not (exclude and matches(relpath, exclude))
+                and is_generated_file(entry.path)
+            ):
+                os.remove(entry.path)
+
+
+@dataclass
+class _DependencyCollection:
+    # Unique dependencies, which are only sorted when they are read with deps_list.
+    str_deps: set[str] = field(default_factory=set)
+    # e.g. {"pip": {"dgl", "pyg"}}, used in conda envs
+    dict_deps: dict[str, set[str]] = field(default_factory=dict)
+
+    def add(self, deps: typing.Iterable[typing.Union[str, _config.PipRequirements]]) -> None:
+        for dep in deps:
+            if isinstance(dep, str):
+                self.str_deps.add(dep)
+            elif isinstance(dep, _config.PipRequirements):
+                self.dict_deps.setdefault("pip", set()).update(dep.pip)
+
+    def update(self, deps: typing.Iterable[typing.Union[str, dict[str, list[str]]]]) -> None:
+        for dep in deps:
+            if isinstance(dep, dict):
+                for k, v in dep.items():
+                    self.dict_deps.setdefault(k, set()).update(v)
+            else:
+                self.str_deps.add(dep)
+
+    def sorted_dict_deps(self, key: str) -> list[str]:
+        return sorted(self.dict_deps.get(key, ()))
+
+    @property
+    def deps_list(self) -> typing.Sequence[typing.Union[str, dict[str, list[str]]]]:
+        dict_deps = {k: sorted(v) for k, v in self.dict_deps.items() if v}
+        if dict_deps:
+            return [*sorted(self.str_deps), dict_deps]
+
+        return sorted(self.str_deps)
 
 
 def dedupe(
@@ -55,18 +177,9 @@ def dedupe(
     Sequence[str | dict[str, list[str]]]
         The ``dependencies`` with all duplicates removed.
     """
-    string_deps: set[str] = set()
-    pip_deps: set[str] = set()
-    for dep in dependencies:
-        if isinstance(dep, str):
-            string_deps.add(dep)
-        elif isinstance(dep, _config.PipRequirements):
-            pip_deps.update(dep.pip)
-
-    if pip_deps:
-        return [*sorted(string_deps), {"pip": sorted(pip_deps)}]
-    else:
-        return sorted(string_deps)
+    collection = _DependencyCollection()
+    collection.add(dependencies)
+    return collection.deps_list
 
 
 def grid(gridspec: dict[str, list[str]]) -> Generator[dict[str, str], None, None]:
@@ -93,6 +206,108 @@ def grid(gridspec: dict[str, list[str]]) -> Generator[dict[str, str], None, None
         yield dict(zip(gridspec.keys(), values))
 
 
+def _pyproject_key(extras: typing.Union[_config.FileExtras, None]) -> tuple[str, str]:
+    # Get the table and key of the list of dependencies selected by ``extras``.
+    if extras is None:
+        raise ValueError("The 'extras' field must be provided for the 'pyproject' file type.")
+
+    if extras.table == "build-system":
+        key = "requires"
+        if extras.key is not None:
+            raise ValueError(
+                "The 'key' field is not allowed for the 'pyproject' file type when 'table' is 'build-system'."
+            )
+    elif extras.table == "project":
+        key = "dependencies"
+        if extras.key is not None:
+            raise ValueError("The 'key' field is not allowed for the 'pyproject' file type when 'table' is 'project'.")
+    else:
+        if extras.key is None:
+            raise ValueError(
+                "The 'key' field is required for the 'pyproject' file type when "
+                "'table' is not one of 'build-system' or 'project'."
+            )
+        key = extras.key
+    return extras.table, key
+
+
+def _pyproject_comment(relative_path_to_config_file: str) -> str:
+    return (
+        f"This list was generated by `{cli_name}`. To make changes, edit "
+        f"{relative_path_to_config_file} and run `{cli_name}`."
+    )
+
+
+def _splice_or_edit_pyproject(
+    contents: str,
+    edits: typing.Iterable[tuple[str, str, typing.Sequence[typing.Union[str, dict[str, list[str]]]]]],
+    relative_path_to_config_file: str,
+) -> str:
+    # Apply (table, key, dependencies) edits to the contents of a pyproject.toml.
+    # Arrays that can be located unambiguously are replaced in place, which is much
+    # faster than parsing and serializing the whole document with tomlkit.
+    # tomlkit is slow to import, so it is only imported for pyproject outputs.
+    import tomlkit
+
+    comment = _pyproject_comment(relative_path_to_config_file)
+    document = None
+    for table_name, key, dependencies in edits:
+        if document is None:
+            with _timings.phase("splice"):
+                spliced = _toml.splice_array(contents, table_name, key, dependencies, comment)
+            if spliced is not None:
+                contents = spliced
+                continue
+            with _timings.phase("tomlkit"):
+                document = tomlkit.parse(contents)
+        with _timings.phase("tomlkit"):
+            _edit_pyproject(
+                document,
+                table_name=table_name,
+                key=key,
+                relative_path_to_config_file=relative_path_to_config_file,
+                dependencies=dependencies,
+            )
+    if document is None:
+        return contents
+    with _timings.phase("tomlkit"):
+        return tomlkit.dumps(document)
+
+
+def _edit_pyproject(
+    document: "tomlkit.TOMLDocument",
+    *,
+    table_name: str,
+    key: str,
+    relative_path_to_config_file: str,
+    dependencies: typing.Sequence[typing.Union[str, dict[str, list[str]]]],
+) -> None:
+    # Replace a list of dependencies in a parsed pyproject.toml.
+    import tomlkit
+
+    toml_deps = tomlkit.array()
+    for dep in dependencies:
+        toml_deps.add_line(dep)
+    toml_deps.add_line(indent="")
+    toml_deps.comment(_pyproject_comment(relative_path_to_config_file))
+
+    # Recursively descend into subtables like "[x.y.z]", creating tables as needed.
+    table = document
+    for section in table_name.split("."):
+        try:
+            table = table[section]
+        except tomlkit.exceptions.NonExistentKey:
+            # If table is not a super-table (i.e. if it has its own contents and is
+            # not simply parted of a nested table name 'x.y.z') add a new line
+            # before adding a new sub-table.
+            if not table.is_super_table():
+                table.add(tomlkit.nl())
+            table[section] = tomlkit.table()
+            table = table[section]
+
+    table[key] = toml_deps
+
+
 def make_dependency_file(
     *,
     file_type: _config.Output,
@@ -148,7 +363,7 @@ def make_dependency_file(
         }
         if conda_env_name is not None:
             env_dict["name"] = conda_env_name
-        file_contents += yaml.dump(env_dict)
+        file_contents += _yaml.dump(env_dict)
     elif file_type in {_config.Output.REQUIREMENTS, _config.Output.CONSTRAINTS}:
         for dep in dependencies:
             if isinstance(dep, dict):
@@ -156,60 +371,15 @@ def make_dependency_file(
 
             file_contents += f"{dep}\n"
     elif file_type == _config.Output.PYPROJECT:
-        if extras is None:
-            raise ValueError("The 'extras' field must be provided for the 'pyproject' file type.")
-
-        if extras.table == "build-system":
-            key = "requires"
-            if extras.key is not None:
-                raise ValueError(
-                    "The 'key' field is not allowed for the 'pyproject' file type when 'table' is 'build-system'."
-                )
-        elif extras.table == "project":
-            key = "dependencies"
-            if extras.key is not None:
-                raise ValueError(
-                    "The 'key' field is not allowed for the 'pyproject' file type when 'table' is 'project'."
-                )
-        else:
-            if extras.key is None:
-                raise ValueError(
-                    "The 'key' field is required for the 'pyproject' file type when "
-                    "'table' is not one of 'build-system' or 'project'."
-                )
-            key = extras.key
+        table_name, key = _pyproject_key(extras)
 
         # This file type needs to be modified in place instead of built from scratch.
         with open(os.path.join(output_dir, file_name)) as f:
-            file_contents_toml = tomlkit.load(f)
-
-        toml_deps = tomlkit.array()
-        for dep in dependencies:
-            toml_deps.add_line(dep)
-        toml_deps.add_line(indent="")
-        toml_deps.comment(
-            f"This list was generated by `{cli_name}`. To make changes, edit "
-            f"{relative_path_to_config_file} and run `{cli_name}`."
+            pyproject_contents = f.read()
+        file_contents = _splice_or_edit_pyproject(
+            pyproject_contents, [(table_name, key, dependencies)], relative_path_to_config_file
         )
 
-        # Recursively descend into subtables like "[x.y.z]", creating tables as needed.
-        table = file_contents_toml
-        for section in extras.table.split("."):
-            try:
-                table = table[section]
-            except tomlkit.exceptions.NonExistentKey:
-                # If table is not a super-table (i.e. if it has its own contents and is
-                # not simply parted of a nested table name 'x.y.z') add a new line
-                # before adding a new sub-table.
-                if not table.is_super_table():
-                    table.add(tomlkit.nl())
-                table[section] = tomlkit.table()
-                table = table[section]
-
-        table[key] = toml_deps
-
-        file_contents = tomlkit.dumps(file_contents_toml)
-
     return file_contents
 
 
@@ -332,32 +502,445 @@ def should_use_specific_entry(matrix_combo: dict[str, str], specific_entry_matri
     )
 
 
+class DependencyResolver:
+    """Resolve the packages that dependency sets contribute to a file.
+
+    The packages a dependency set contributes only depend on the output type and
+    matrix combination being generated, and many file keys typically include the
+    same dependency sets. Results are therefore cached, so each dependency set is
+    only resolved once per output type and matrix combination.
+
+    Parameters
+    ----------
+    parsed_config : Config
+        The parsed dependencies.yaml config file.
+    """
+
+    def __init__(self, parsed_config: _config.Config):
+        self.parsed_config = parsed_config
+        self._cache: dict[
+            tuple[str, _config.Output, tuple[tuple[str, str], ...]],
+            tuple[typing.Union[str, _config.PipRequirements], ...],
+        ] = {}
+        self.hits = 0
+        """The number of resolutions that were answered from the cache."""
+        self.misses = 0
+        """The number of resolutions that had to be computed."""
+
+    def resolve(
+        self, include: str, output_type: _config.Output, matrix_combo: dict[str, str]
+    ) -> tuple[typing.Union[str, _config.PipRequirements], ...]:
+        """Resolve the packages a dependency set contributes to a file.
+
+        Parameters
+        ----------
+        include : str
+            The name of the dependency set.
+        output_type : Output
+            The type of the file being generated.
+        matrix_combo : dict[str, str]
+            The matrix combination of the file being generated.
+
+        Returns
+        -------
+        tuple[str | PipRequirements, ...]
+            The packages, possibly including duplicates.
+
+        Raises
+        ------
+        ValueError
+            If a ``specific`` entry of the dependency set has no matrix matching
+            ``matrix_combo``.
+        """
+        key = (include, output_type, tuple(sorted(matrix_combo.items())))
+        try:
+            packages = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            _timings.count("dependency_sets_resolved")
+        else:
+            self.hits += 1
+            _timings.count("dependency_set_cache_hits")
+            return packages
+
+        dependencies: list[typing.Union[str, _config.PipRequirements]] = []
+        dependency_entry = self.parsed_config.dependencies[include]
+
+        for common_entry in dependency_entry.common:
+            if output_type not in common_entry.output_types:
+                continue
+            dependencies.extend(common_entry.packages)
+
+        for specific_entry in dependency_entry.specific:
+            if output_type not in specific_entry.output_types:
+                continue
+
+            matrices_entry = specific_entry.match(matrix_combo)
+            if matrices_entry is None:
+                raise ValueError(f"No matching matrix found in '{include}' for: {matrix_combo}")
+            # A package list may be empty as a way to indicate that for some
+            # matrix elements no packages should be installed.
+            dependencies.extend(matrices_entry.packages)
+
+        packages = self._cache[key] = tuple(dependencies)
+        return packages
+
+
 @dataclass
-class _DependencyCollection:
-    str_deps: set[str]
-    # e.g. {"pip": ["dgl", "pyg"]}, used in conda envs
-    dict_deps: dict[str, list[str]]
+class ResolvedDeps:
+    """Dependencies resolved by :func:`resolve_dependencies`."""
 
-    def update(self, deps: typing.Sequence[typing.Union[str, dict[str, list[str]]]]) -> None:
-        for dep in deps:
-            if isinstance(dep, dict):
-                for k, v in dep.items():
-                    if k in self.dict_deps:
-                        self.dict_deps[k].extend(v)
-                        self.dict_deps[k] = sorted(set(self.dict_deps[k]))
-                    else:
-                        self.dict_deps[k] = v
-            else:
-                self.str_deps.add(dep)
+    requirements: list[str]
+    """The unique dependencies, sorted."""
+
+    pip: list[str]
+    """The unique dependencies to install with pip in a Conda environment, sorted."""
 
     @property
     def deps_list(self) -> typing.Sequence[typing.Union[str, dict[str, list[str]]]]:
-        if self.dict_deps:
-            return [*sorted(self.str_deps), self.dict_deps]
+        """The dependencies in the form returned by :func:`dedupe`."""
+        if self.pip:
+            return [*self.requirements, {"pip": self.pip}]
+        return [*self.requirements]
+
+
+def resolve_dependencies(
+    parsed_config: _config.Config,
+    file_keys: list[str],
+    output_type: _config.Output,
+    matrix: typing.Union[dict[str, list[str]], None] = None,
+    *,
+    resolver: typing.Union[DependencyResolver, None] = None,
+) -> ResolvedDeps:
+    """Resolve the dependencies of file keys without generating any files.
+
+    This returns the same dependencies that :func:`make_dependency_files` would
+    write, merged across all of ``file_keys`` and matrix combinations, without
+    rendering file contents or reading any files.
+
+    Parameters
+    ----------
+    parsed_config : Config
+        The parsed dependencies.yaml config file.
+    file_keys : list[str]
+        The list of file keys to use.
+    output_type : Output
+        The output type to resolve the dependencies for.
+    matrix : dict[str, list[str]] | None
+        The matrix to use, or None if the default matrix from each file key
+        should be used.
+    resolver : DependencyResolver | None
+        The resolver to use for dependency sets, or None to use a new one.
+
+    Returns
+    -------
+    ResolvedDeps
+        The resolved dependencies.
+
+    Raises
+    ------
+    ValueError
+        If a ``specific`` entry of an included dependency set has no matrix
+        matching a matrix combination.
+    """
+    if resolver is None:
+        resolver = DependencyResolver(parsed_config)
+    elif resolver.parsed_config is not parsed_config:
+        raise ValueError("The resolver must have been created for the same parsed_config.")
+
+    collection = _DependencyCollection()
+    for file_key in file_keys:
+        file_config = parsed_config.files[file_key]
+        for matrix_combo in grid(file_config.matrix if matrix is None else matrix):
+            for include in file_config.includes:
+                collection.add(resolver.resolve(include, output_type, matrix_combo))
+
+    return ResolvedDeps(requirements=sorted(collection.str_deps), pip=collection.sorted_dict_deps("pip"))
+
+
+@dataclass
+class _FileSpec:
+    # A single (file key, output type, matrix combination) to generate.
+    file_key: str
+    file_type: _config.Output
+    matrix_combo: dict[str, str]
+
+
+@dataclass
+class GeneratedFile:
+    """A dependency file generated by :func:`generate`."""
 
-        return [*sorted(self.str_deps)]
+    file_key: str
+    """The file key the file was generated from."""
 
+    file_type: _config.Output
+    """The type of the file."""
 
+    matrix_combo: dict[str, str]
+    """The matrix combination the file was generated for."""
+
+    path: str
+    """The path the file is written to, unless it is written to stdout."""
+
+    dependencies: typing.Sequence[typing.Union[str, dict[str, list[str]]]]
+    """The deduplicated dependencies of the file, as passed to :func:`make_dependency_file`."""
+
+    contents: str
+    """The contents of the file."""
+
+
+def _output_path(parsed_config: _config.Config, spec: _FileSpec) -> str:
+    output_dir = get_output_dir(
+        file_type=spec.file_type,
+        config_file_path=parsed_config.path,
+        file_config=parsed_config.files[spec.file_key],
+    )
+    return os.path.join(output_dir, get_filename(spec.file_type, spec.file_key, spec.matrix_combo))
+
+
+def _file_dependencies(
+    parsed_config: _config.Config, resolver: DependencyResolver, spec: _FileSpec
+) -> typing.Sequence[typing.Union[str, dict[str, list[str]]]]:
+    dependencies: list[typing.Union[str, _config.PipRequirements]] = []
+
+    # Collect all includes from each dependency list corresponding to this
+    # (file_name, file_type, matrix_combo) tuple. The current tuple corresponds
+    # to a single file to be written.
+    with _timings.phase("resolve", file_key=spec.file_key, output_type=spec.file_type.value):
+        for include in parsed_config.files[spec.file_key].includes:
+            dependencies.extend(resolver.resolve(include, spec.file_type, spec.matrix_combo))
+        return dedupe(dependencies)
+
+
+def _render_file(
+    parsed_config: _config.Config,
+    resolver: DependencyResolver,
+    conda_channels: list[str],
+    spec: _FileSpec,
+) -> GeneratedFile:
+    file_config = parsed_config.files[spec.file_key]
+    full_file_name = get_filename(spec.file_type, spec.file_key, spec.matrix_combo)
+    deduped_deps = _file_dependencies(parsed_config, resolver, spec)
+
+    output_dir = get_output_dir(
+        file_type=spec.file_type,
+        config_file_path=parsed_config.path,
+        file_config=file_config,
+    )
+    with _timings.phase("render", file_key=spec.file_key, output_type=spec.file_type.value):
+        contents = make_dependency_file(
+            file_type=spec.file_type,
+            conda_env_name=os.path.splitext(full_file_name)[0],
+            file_name=full_file_name,
+            config_file=parsed_config.path,
+            output_dir=output_dir,
+            conda_channels=conda_channels,
+            dependencies=deduped_deps,
+            extras=file_config.extras,
+        )
+    return GeneratedFile(
+        file_key=spec.file_key,
+        file_type=spec.file_type,
+        matrix_combo=spec.matrix_combo,
+        path=os.path.join(output_dir, full_file_name),
+        dependencies=deduped_deps,
+        contents=contents,
+    )
+
+
+# State of each worker process used for parallel generation, set by _init_worker.
+_worker_state: typing.Union[tuple[_config.Config, DependencyResolver, list[str]], None] = None
+
+
+def _init_worker(parsed_config: _config.Config, conda_channels: list[str]) -> None:
+    global _worker_state
+    _worker_state = (parsed_config, DependencyResolver(parsed_config), conda_channels)
+
+
+def _render_file_in_worker(spec: _FileSpec) -> GeneratedFile:
+    assert _worker_state is not None
+    parsed_config, resolver, conda_channels = _worker_state
+    return _render_file(parsed_config, resolver, conda_channels, spec)
+
+
+def _render_pyproject(
+    parsed_config: _config.Config,
+    resolver: DependencyResolver,
+    specs: list[_FileSpec],
+) -> list[GeneratedFile]:
+    # Apply the edits of all file keys modifying the same pyproject.toml, so that it
+    # is only parsed and serialized once. One file is returned for each file key,
+    # all with the same contents.
+    output_dir = get_output_dir(
+        file_type=_config.Output.PYPROJECT,
+        config_file_path=parsed_config.path,
+        file_config=parsed_config.files[specs[-1].file_key],
+    )
+    path = os.path.join(output_dir, get_filename(_config.Output.PYPROJECT, specs[-1].file_key, {}))
+    edits = [
+        (*_pyproject_key(parsed_config.files[spec.file_key].extras), _file_dependencies(parsed_config, resolver, spec))
+        for spec in specs
+    ]
+
+    with _timings.phase("render", file_key=specs[-1].file_key, output_type=_config.Output.PYPROJECT.value):
+        with open(path) as f:
+            contents = _splice_or_edit_pyproject(f.read(), edits, os.path.relpath(parsed_config.path, output_dir))
+
+    return [
+        GeneratedFile(
+            file_key=spec.file_key,
+            file_type=_config.Output.PYPROJECT,
+            matrix_combo=spec.matrix_combo,
+            path=path,
+            dependencies=dependencies,
+            contents=contents,
+        )
+        for spec, (_, _, dependencies) in zip(specs, edits)
+    ]
+
+
+def _plan_files(
+    parsed_config: _config.Config,
+    file_keys: list[str],
+    output: typing.Union[set[_config.Output], None],
+    matrix: typing.Union[dict[str, list[str]], None],
+) -> list[_FileSpec]:
+    specs = []
+    for file_key in file_keys:
+        file_config = parsed_config.files[file_key]
+        file_types_to_generate = file_config.output if output is None else output
+        if matrix is not None:
+            file_matrix = matrix
+        else:
+            file_matrix = file_config.matrix
+        calculated_grid = list(grid(file_matrix))
+        if _config.Output.PYPROJECT in file_types_to_generate and len(calculated_grid) > 1:
+            raise ValueError("Pyproject outputs can't have more than one matrix output")
+        for file_type in file_types_to_generate:
+            for matrix_combo in calculated_grid:
+                specs.append(_FileSpec(file_key=file_key, file_type=file_type, matrix_combo=matrix_combo))
+    _timings.count("matrix_combinations", len(specs))
+    return specs
+
+
+def _generate(
+    parsed_config: _config.Config,
+    resolver: DependencyResolver,
+    conda_channels: list[str],
+    specs: list[_FileSpec],
+    max_workers: typing.Union[int, None],
+) -> Generator[GeneratedFile, None, None]:
+    # pyproject.toml files are modified in place, possibly by several file keys. All
+    # of their edits are applied together when the last of them is reached.
+    pyproject_edits: dict[str, list[_FileSpec]] = {}
+    for spec in specs:
+        if spec.file_type == _config.Output.PYPROJECT:
+            pyproject_edits.setdefault(os.path.realpath(_output_path(parsed_config, spec)), []).append(spec)
+    last_pyproject_edits = {id(edits[-1]): edits for edits in pyproject_edits.values()}
+
+    def render(spec: _FileSpec) -> list[GeneratedFile]:
+        if spec.file_type != _config.Output.PYPROJECT:
+            return [_render_file(parsed_config, resolver, conda_channels, spec)]
+        edits = last_pyproject_edits.get(id(spec))
+        return [] if edits is None else _render_pyproject(parsed_config, resolver, edits)
+
+    if max_workers == 1 or len(specs) <= 1:
+        for spec in specs:
+            yield from render(spec)
+        return
+
+    errors: list[Exception] = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(parsed_config, conda_channels),
+    ) as executor:
+        # pyproject.toml files are rendered here.
+        futures = [
+            None if spec.file_type == _config.Output.PYPROJECT else executor.submit(_render_file_in_worker, spec)
+            for spec in specs
+        ]
+        for spec, future in zip(specs, futures):
+            try:
+                generated = render(spec) if future is None else [future.result()]
+            except Exception as e:
+                errors.append(e)
+                continue
+            # Files are yielded in the same order as when generating serially.
+            yield from generated
+
+    if len(errors) == 1:
+        raise errors[0]
+    elif errors:
+        raise ValueError(
+            f"{len(errors)} dependency files could not be generated:" + "".join(f"\n - {e}" for e in errors)
+        ) from errors[0]
+
+
+def generate(
+    *,
+    parsed_config: _config.Config,
+    file_keys: typing.Union[list[str], None] = None,
+    output: typing.Union[set[_config.Output], None] = None,
+    matrix: typing.Union[dict[str, list[str]], None] = None,
+    prepend_channels: typing.Union[list[str], None] = None,
+    resolver: typing.Union[DependencyResolver, None] = None,
+    max_workers: typing.Union[int, None] = 1,
+) -> Generator[GeneratedFile, None, None]:
+    """Generate dependency files in memory.
+
+    Unlike :func:`make_dependency_files`, nothing is printed or written to disk.
+    Each file is generated when the iterator reaches it. ``pyproject.toml`` files
+    are read from disk. When several file keys modify the same ``pyproject.toml``
+    file, it is only generated once, when the last of them is reached, with the
+    changes of all of them applied. One file is then yielded for each of these
+    file keys, with its own dependencies and the same contents.
+
+    Parameters
+    ----------
+    parsed_config : Config
+        The parsed dependencies.yaml config file.
+    file_keys : list[str] | None
+        The list of file keys to use, or None to use all of them.
+    output : set[Output] | None
+        The set of file types to generate, or None to generate the file types
+        specified by the file key.
+    matrix : dict[str, list[str]] | None
+        The matrix to use, or None if the default matrix from each file key
+        should be used.
+    prepend_channels : list[str] | None
+        List of channels to prepend to the ones from parsed_config.
+    resolver : DependencyResolver | None
+        The resolver to use for dependency sets, or None to use a new one.
+    max_workers : int | None
+        The number of worker processes to use to generate files in parallel, or
+        None to use one per CPU. Files are still yielded in the same order, and
+        all errors are collected and raised together after the other files.
+
+    Yields
+    ------
+    GeneratedFile
+        The generated files.
+
+    Raises
+    ------
+    ValueError
+        If the file is malformed. There are numerous different error cases
+        which are described by the error messages.
+    """
+    if resolver is None:
+        resolver = DependencyResolver(parsed_config)
+    elif resolver.parsed_config is not parsed_config:
+        raise ValueError("The resolver must have been created for the same parsed_config.")
+
+    if file_keys is None:
+        file_keys = list(parsed_config.files.keys())
+    specs = _plan_files(parsed_config, file_keys, output, matrix)
+    conda_channels = (prepend_channels or []) + parsed_config.channels
+    yield from _generate(parsed_config, resolver, conda_channels, specs, max_workers)
+
+
+@_timings.phase("generate")
 def make_dependency_files(
     *,
     parsed_config: _config.Config,
@@ -366,6 +949,11 @@ def make_dependency_files(
     matrix: typing.Union[dict[str, list[str]], None],
     prepend_channels: list[str],
     to_stdout: bool,
+    resolver: typing.Union[DependencyResolver, None] = None,
+    max_workers: typing.Union[int, None] = 1,
+    writer: typing.Union[FileWriter, None] = None,
+    manifest: typing.Union[Manifest, None] = None,
+    incremental: bool = False,
 ) -> None:
     """Generate dependency files.
 
@@ -391,6 +979,30 @@ def make_dependency_files(
         Whether the output should be written to stdout. If False, it will be
         written to a file computed based on the output file type and
         config_file_path.
+    resolver : DependencyResolver | None
+        The resolver to use for dependency sets, or None to use a new one. Passing
+        a resolver allows its cache to be reused across calls and its statistics
+        to be inspected afterwards.
+    max_workers : int | None
+        The number of worker processes to use to generate files in parallel, or
+        None to use one per CPU. Files are generated serially if this is 1, and
+        always when writing to stdout. When generating in parallel, ``resolver``
+        is only used for ``pyproject.toml`` files, files are still written in the
+        same order, and all errors are collected and raised together.
+    writer : FileWriter | None
+        The writer to use for files written to disk, or None to use a new one
+        that always writes every file. Passing a writer allows its options to be
+        configured and its statistics to be inspected afterwards.
+    manifest : Manifest | None
+        A manifest in which to record the files written to disk, or None to not
+        record them. When ``output`` and ``matrix`` are None, files previously
+        recorded for ``file_keys`` (or for file keys that no longer exist) that
+        are not generated again are deleted. The manifest is saved afterwards.
+    incremental : bool
+        Whether to skip files that ``manifest`` records as generated from the
+        same inputs as now and that have not been modified since. A file's
+        inputs are its entry in ``files``, the dependency sets it includes, and
+        the channels for Conda environment files. Requires ``manifest``.
 
     Raises
     ------
@@ -404,127 +1016,109 @@ def make_dependency_files(
             "when writing to stdout is not supported."
         )
 
+    if resolver is None:
+        resolver = DependencyResolver(parsed_config)
+    elif resolver.parsed_config is not parsed_config:
+        raise ValueError("The resolver must have been created for the same parsed_config.")
+
+    if writer is None:
+        writer = FileWriter()
+
+    if incremental and manifest is None:
+        raise ValueError("Incremental generation requires a manifest.")
+
     # the list of conda channels does not depend on individual file keys
     conda_channels = prepend_channels + parsed_config.channels
 
-    # initialize a container for "all dependencies found across all files", to support
-    # passing multiple files keys and writing a merged result to stdout
-    all_dependencies = _DependencyCollection(str_deps=set(), dict_deps={})
-
-    for file_key in file_keys:
-        file_config = parsed_config.files[file_key]
-        file_types_to_generate = file_config.output if output is None else output
-        if matrix is not None:
-            file_matrix = matrix
-        else:
-            file_matrix = file_config.matrix
-        calculated_grid = list(grid(file_matrix))
-        if _config.Output.PYPROJECT in file_types_to_generate and len(calculated_grid) > 1:
-            raise ValueError("Pyproject outputs can't have more than one matrix output")
-        for file_type in file_types_to_generate:
-            for matrix_combo in calculated_grid:
-                dependencies = []
-
-                # Collect all includes from each dependency list corresponding
-                # to this (file_name, file_type, matrix_combo) tuple. The
-                # current tuple corresponds to a single file to be written.
-                for include in file_config.includes:
-                    dependency_entry = parsed_config.dependencies[include]
-
-                    for common_entry in dependency_entry.common:
-                        if file_type not in common_entry.output_types:
-                            continue
-                        dependencies.extend(common_entry.packages)
-
-                    for specific_entry in dependency_entry.specific:
-                        if file_type not in specific_entry.output_types:
-                            continue
-
-                        # Ensure that all specific matrices are unique
-                        num_matrices = len(specific_entry.matrices)
-                        num_unique = len(
-                            {
-                                frozenset(specific_matrices_entry.matrix.items())
-                                for specific_matrices_entry in specific_entry.matrices
-                            }
-                        )
-                        if num_matrices != num_unique:
-                            err = f"All matrix entries must be unique. Found duplicates in '{include}':"
-                            for specific_matrices_entry in specific_entry.matrices:
-                                err += f"\n - {specific_matrices_entry.matrix}"
-                            raise ValueError(err)
-
-                        fallback_entry = None
-                        for specific_matrices_entry in specific_entry.matrices:
-                            # An empty `specific_matrices_entry["matrix"]` is
-                            # valid and can be used to specify a fallback_entry for a
-                            # `matrix_combo` for which no specific entry
-                            # exists. In that case we save the fallback_entry result
-                            # and only use it at the end if nothing more
-                            # specific is found.
-                            if not specific_matrices_entry.matrix:
-                                fallback_entry = specific_matrices_entry
-                                continue
-
-                            if should_use_specific_entry(matrix_combo, specific_matrices_entry.matrix):
-                                # A package list may be empty as a way to
-                                # indicate that for some matrix elements no
-                                # packages should be installed.
-                                dependencies.extend(specific_matrices_entry.packages or [])
-                                break
-                        else:
-                            if fallback_entry:
-                                dependencies.extend(fallback_entry.packages)
-                            else:
-                                raise ValueError(f"No matching matrix found in '{include}' for: {matrix_combo}")
-
-                # Dedupe deps and print / write to filesystem
-                full_file_name = get_filename(file_type, file_key, matrix_combo)
-                deduped_deps = dedupe(dependencies)
-
-                output_dir = get_output_dir(
-                    file_type=file_type,
-                    config_file_path=parsed_config.path,
-                    file_config=file_config,
-                )
-                contents = make_dependency_file(
-                    file_type=file_type,
-                    conda_env_name=os.path.splitext(full_file_name)[0],
-                    file_name=full_file_name,
-                    config_file=parsed_config.path,
-                    output_dir=output_dir,
-                    conda_channels=conda_channels,
-                    dependencies=deduped_deps,
-                    extras=file_config.extras,
-                )
-
-                if to_stdout:
-                    if len(file_keys) == 1:
-                        print(contents)
+    with _timings.phase("plan"):
+        specs = _plan_files(parsed_config, file_keys, output, matrix)
+
+    if not to_stdout:
+        graph = InputGraph(parsed_config, conda_channels)
+        up_to_date: list[str] = []
+        if incremental:
+            assert manifest is not None
+            outdated = []
+            with _timings.phase("check_manifest"):
+                for spec in specs:
+                    file_path = _output_path(parsed_config, spec)
+                    # pyproject.toml files may be edited by several file keys, so they
+                    # are always generated again.
+                    if spec.file_type != _config.Output.PYPROJECT and manifest.is_up_to_date(
+                        file_path,
+                        spec.file_key,
+                        spec.file_type,
+                        graph.inputs(spec.file_key, spec.file_type, spec.matrix_combo),
+                    ):
+                        up_to_date.append(file_path)
                     else:
-                        all_dependencies.update(deduped_deps)
-                else:
-                    os.makedirs(output_dir, exist_ok=True)
-                    file_path = os.path.join(output_dir, full_file_name)
-                    with open(file_path, "w") as f:
-                        f.write(contents)
-
-    # create one unified output from all the file_keys, and print it to stdout
-    if to_stdout and len(file_keys) > 1:
-        # convince mypy that 'output' is not None here
-        #
-        # 'output' is technically a set because of https://github.com/rapidsai/dependency-file-generator/pull/74,
-        # but since https://github.com/rapidsai/dependency-file-generator/pull/79 it's only ever one of the following:
-        #
-        #   - an exactly-1-item set (stdout=True, or when used by rapids-build-backend)
-        #   - 'None' (stdout=False)
-        #
-        err_msg = (
-            "Exactly 1 output type should be provided when asking rapids-dependency-file-generator to write to stdout. "
-            "If you see this, you've found a bug. Please report it."
-        )
-        assert output is not None, err_msg
+                        outdated.append(spec)
+            specs = outdated
+            writer.unchanged += len(up_to_date)
+
+        written: list[GeneratedFile] = []
+        succeeded = False
+        try:
+            for generated in _generate(parsed_config, resolver, conda_channels, specs, max_workers):
+                # The file keys editing the same pyproject.toml file are yielded one
+                # after the other, with the same contents.
+                if not (written and written[-1].path == generated.path):
+                    with _timings.phase("write", file_key=generated.file_key, output_type=generated.file_type.value):
+                        writer.write(generated.path, generated.contents)
+                written.append(generated)
+            succeeded = True
+        finally:
+            with _timings.phase("finish"):
+                writer.finish(succeeded)
+            if manifest is not None and (succeeded or not writer.all_or_nothing):
+                with _timings.phase("manifest"):
+                    # A pyproject.toml file edited by several file keys is recorded
+                    # once, for the last of them, with the inputs of all of them.
+                    recorded: dict[str, tuple[GeneratedFile, dict[str, str]]] = {}
+                    for generated in written:
+                        inputs = recorded[generated.path][1] if generated.path in recorded else {}
+                        inputs.update(graph.inputs(generated.file_key, generated.file_type, generated.matrix_combo))
+                        recorded[generated.path] = (generated, inputs)
+                    for generated, inputs in recorded.values():
+                        manifest.record(
+                            generated.path, generated.file_key, generated.file_type, generated.contents, inputs=inputs
+                        )
+                    # Only a full regeneration of a file key shows which of its files are
+                    # no longer generated.
+                    if succeeded and output is None and matrix is None:
+                        manifest.delete_orphans(
+                            parsed_config, file_keys, [*up_to_date, *(generated.path for generated in written)]
+                        )
+                    manifest.save()
+        return
+
+    if len(file_keys) == 1:
+        for generated in _generate(parsed_config, resolver, conda_channels, specs, 1):
+            print(generated.contents)
+        return
+
+    # create one unified output from all the file_keys, and print it to stdout. The
+    # files of the individual file keys are never rendered, only their dependencies
+    # are merged.
+    all_dependencies = _DependencyCollection()
+    for spec in specs:
+        all_dependencies.update(_file_dependencies(parsed_config, resolver, spec))
+
+    # convince mypy that 'output' is not None here
+    #
+    # 'output' is technically a set because of https://github.com/rapidsai/dependency-file-generator/pull/74,
+    # but since https://github.com/rapidsai/dependency-file-generator/pull/79 it's only ever one of the following:
+    #
+    #   - an exactly-1-item set (stdout=True, or when used by rapids-build-backend)
+    #   - 'None' (stdout=False)
+    #
+    err_msg = (
+        "Exactly 1 output type should be provided when asking rapids-dependency-file-generator to write to stdout. "
+        "If you see this, you've found a bug. Please report it."
+    )
+    assert output is not None, err_msg
 
+    with _timings.phase("render"):
         contents = make_dependency_file(
             file_type=output.pop(),
             conda_env_name=None,
@@ -535,4 +1129,4 @@ def make_dependency_files(
             dependencies=all_dependencies.deps_list,
             extras=None,
         )
-        print(contents)
+    print(contents)
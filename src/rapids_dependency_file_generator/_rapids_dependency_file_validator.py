@@ -1,20 +1,47 @@
 """Logic for validating dependency files."""
 
-import importlib.resources
+import functools
 import json
 import sys
 import textwrap
 import typing
 import warnings
 
-import jsonschema
-from jsonschema.exceptions import best_match
-
+from . import _timings
 from ._warnings import UnusedDependencySetWarning
 
-SCHEMA = json.loads(importlib.resources.files(__package__).joinpath("schema.json").read_bytes())
+if typing.TYPE_CHECKING:
+    import jsonschema
+
+    SCHEMA: dict[str, typing.Any]
+
+
+@functools.cache
+def _schema() -> dict[str, typing.Any]:
+    import importlib.resources
+
+    return json.loads(importlib.resources.files(__package__).joinpath("schema.json").read_bytes())
+
+
+def __getattr__(name: str) -> typing.Any:
+    # The schema is only loaded when it is used, since many runs never validate
+    # anything, for example when the config file is found in the cache.
+    if name == "SCHEMA":
+        return _schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.cache
+def _validator() -> "jsonschema.Draft7Validator":
+    # Building a validator compiles the schema's references and format checkers,
+    # so it is shared by every validation in the process. jsonschema is slow to
+    # import, so it is only imported here.
+    import jsonschema
 
+    return jsonschema.Draft7Validator(_schema())
 
+
+@_timings.phase("validate")
 def validate_dependencies(dependencies: dict[str, typing.Any]) -> None:
     """Validate a dictionary against the dependencies.yaml spec.
 
@@ -28,17 +55,34 @@ def validate_dependencies(dependencies: dict[str, typing.Any]) -> None:
     jsonschema.exceptions.ValidationError
         If the dependencies do not conform to the schema
     """
-    validator = jsonschema.Draft7Validator(SCHEMA)
-    errors = list(validator.iter_errors(dependencies))
-    if len(errors) > 0:
+    validator = _validator()
+    # Collecting every error is much slower than checking validity, so only do it
+    # when there is something to report.
+    if not validator.is_valid(dependencies):
+        from jsonschema.exceptions import best_match
+
         print("The provided dependency file contains schema errors.", file=sys.stderr)
-        best_matching_error = best_match(errors)
+        best_matching_error = best_match(validator.iter_errors(dependencies))
         print("\n", textwrap.indent(str(best_matching_error), "\t"), "\n", file=sys.stderr)
         raise RuntimeError("The provided dependencies data is invalid.")
 
-    unused_dependency_sets = set(dependencies["dependencies"].keys())
-    unused_dependency_sets.difference_update(
-        i for file_config in dependencies["files"].values() for i in file_config["includes"]
+    warn_unused_dependency_sets(
+        dependencies["dependencies"].keys(),
+        (i for file_config in dependencies["files"].values() for i in file_config["includes"]),
     )
+
+
+def warn_unused_dependency_sets(dependency_sets: typing.Iterable[str], includes: typing.Iterable[str]) -> None:
+    """Warn about dependency sets that are not included by any file.
+
+    Parameters
+    ----------
+    dependency_sets : Iterable[str]
+        The names of all dependency sets.
+    includes : Iterable[str]
+        The names of all dependency sets included by any file.
+    """
+    unused_dependency_sets = set(dependency_sets)
+    unused_dependency_sets.difference_update(includes)
     for dep in sorted(unused_dependency_sets):
         warnings.warn(f'Dependency set "{dep}" is not referred to anywhere in "files:"', UnusedDependencySetWarning)
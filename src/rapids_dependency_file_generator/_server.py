@@ -0,0 +1,215 @@
+"""A long-lived server that generates dependency files from configs kept in memory.
+
+Requests and responses are JSON objects sent over a Unix socket, one per
+connection, each terminated by a newline.
+"""
+
+import builtins
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import typing
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import _config, _warnings
+from ._cache import DEFAULT_MAX_SIZE, ConfigCache
+from ._rapids_dependency_file_generator import DependencyResolver, make_dependency_files
+from ._writer import FileWriter
+
+__all__ = [
+    "DependencyFileServer",
+    "query",
+]
+
+
+@dataclass
+class _LoadedConfig:
+    stat: tuple[int, int]
+    validated: bool
+    parsed_config: _config.Config
+    resolver: DependencyResolver
+    warnings: list[tuple[str, str]]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "DependencyFileServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            # The client only checked whether the server is running.
+            return
+        try:
+            response = self.server.handle_query(json.loads(line))
+        except Exception as e:
+            response = {"error": str(e), "error_type": type(e).__name__, "stderr": ""}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class DependencyFileServer(socketserver.UnixStreamServer):
+    """Serve dependency file generation requests on a Unix socket.
+
+    Parsed configs and the dependency sets resolved from them are kept in
+    memory, keyed by the path of the config file, and are only loaded again
+    when the modification time or size of the file changes. Requests are
+    handled one at a time.
+
+    A request has the following keys, which correspond to the arguments of
+    :func:`make_dependency_files`:
+
+    - ``config``: the absolute path of the config file.
+    - ``file_keys``: the file keys to generate, or null for all of them.
+    - ``output``: a list of output types, or null.
+    - ``matrix``: a mapping of matrix keys to lists of values, or null.
+    - ``prepend_channels``: a list of channels.
+    - ``to_stdout``: whether to return the output instead of writing files.
+    - ``write_if_changed``, ``all_or_nothing``: options of :class:`FileWriter`.
+    - ``validate``: whether to validate the config file when loading it.
+    - ``cache_dir``, ``cache_max_size``: an on-disk :class:`ConfigCache` to use
+      when loading the config file, or null.
+    - ``jobs``: the number of worker processes, with 0 for one per CPU.
+
+    The response has the keys ``stdout`` and ``stderr`` with the text the
+    command line interface would print, and ``warnings``, a list of warning
+    category names and messages. If the request fails, the response has the
+    keys ``error`` and ``error_type`` instead of ``stdout`` and ``warnings``,
+    and ``stderr`` has the diagnostics printed before the failure, such as the
+    schema errors of an invalid config file.
+
+    Parameters
+    ----------
+    socket_path : str
+        The path of the socket to listen on. A stale socket left behind by a
+        server that is no longer running is replaced.
+    """
+
+    def __init__(self, socket_path: str):
+        if os.path.exists(socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(socket_path)
+            except ConnectionRefusedError:
+                os.unlink(socket_path)
+            else:
+                raise ValueError(f"A server is already listening on {socket_path}")
+        self.configs: dict[str, _LoadedConfig] = {}
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+
+    def _load_config(self, path: str, validate: bool, cache: typing.Union[ConfigCache, None]) -> _LoadedConfig:
+        st = os.stat(path)
+        stat = (st.st_mtime_ns, st.st_size)
+        loaded = self.configs.get(path)
+        if loaded is None or loaded.stat != stat or (validate and not loaded.validated):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                parsed_config = _config.load_config_from_file(Path(path), cache=cache, validate=validate)
+            loaded = self.configs[path] = _LoadedConfig(
+                stat=stat,
+                validated=validate,
+                parsed_config=parsed_config,
+                resolver=DependencyResolver(parsed_config),
+                warnings=[(w.category.__name__, str(w.message)) for w in caught],
+            )
+        return loaded
+
+    def handle_query(self, request: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        """Generate dependency files for a request.
+
+        Parameters
+        ----------
+        request : dict[str, Any]
+            The request.
+
+        Returns
+        -------
+        dict[str, Any]
+            The response.
+        """
+        cache_dir = request.get("cache_dir")
+        cache = ConfigCache(cache_dir, max_size=request.get("cache_max_size", DEFAULT_MAX_SIZE)) if cache_dir else None
+        output = request.get("output")
+        to_stdout = request.get("to_stdout", False)
+        writer = FileWriter(
+            write_if_changed=request.get("write_if_changed", False),
+            all_or_nothing=request.get("all_or_nothing", False),
+        )
+
+        # Requests are handled one at a time, so what would be printed by the command
+        # line interface can be captured by redirecting the streams of this process.
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                loaded = self._load_config(request["config"], request.get("validate", True), cache)
+                parsed_config = loaded.parsed_config
+                make_dependency_files(
+                    parsed_config=parsed_config,
+                    file_keys=request.get("file_keys") or list(parsed_config.files.keys()),
+                    output=None if output is None else {_config.Output(o) for o in output},
+                    matrix=request.get("matrix"),
+                    prepend_channels=request.get("prepend_channels", []),
+                    to_stdout=to_stdout,
+                    resolver=loaded.resolver,
+                    max_workers=request.get("jobs", 1) or None,
+                    writer=writer,
+                )
+        except Exception as e:
+            return {"error": str(e), "error_type": type(e).__name__, "stderr": stderr.getvalue()}
+
+        if writer.write_if_changed and not to_stdout:
+            stderr.write(f"{writer.written} files written, {writer.unchanged} unchanged\n")
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "warnings": loaded.warnings}
+
+
+def query(socket_path: str, request: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """Send a request to a running :class:`DependencyFileServer`.
+
+    Warnings in the response are issued again in this process, and a failed
+    request writes the diagnostics of the server to stderr, then raises an
+    exception of the same type if it is a built-in one.
+
+    Parameters
+    ----------
+    socket_path : str
+        The path of the socket the server listens on.
+    request : dict[str, Any]
+        The request.
+
+    Returns
+    -------
+    dict[str, Any]
+        The response.
+
+    Raises
+    ------
+    OSError
+        If no server is listening on ``socket_path``.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+
+    if "error" in response:
+        sys.stderr.write(response.get("stderr", ""))
+        error_type = getattr(builtins, response["error_type"], None)
+        if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+            error_type = RuntimeError
+        raise error_type(response["error"])
+
+    for category_name, message in response["warnings"]:
+        category = getattr(_warnings, category_name, _warnings.DependencyFileGeneratorWarning)
+        warnings.warn(message, category, stacklevel=2)
+    return response
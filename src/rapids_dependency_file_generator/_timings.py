@@ -0,0 +1,167 @@
+"""Timing of the phases of dependency file generation."""
+
+import contextlib
+import contextvars
+import time
+import typing
+from collections.abc import Generator
+from dataclasses import dataclass
+
+__all__ = [
+    "Timings",
+]
+
+
+@dataclass
+class PhaseTiming:
+    """The time spent in one phase."""
+
+    seconds: float = 0.0
+    """The total time spent in the phase, including nested phases."""
+
+    calls: int = 0
+    """The number of times the phase was entered."""
+
+
+class Timings:
+    """Time spent in each phase of generating dependency files.
+
+    While a ``Timings`` object is active, the functions of this package record
+    the time spent reading and validating the config, resolving dependencies,
+    rendering and writing files, as well as counters such as the number of
+    matrix combinations evaluated. Nothing is recorded, and there is almost no
+    overhead, while no ``Timings`` object is active::
+
+        timings = Timings()
+        with timings.activate():
+            make_dependency_files(...)
+        print(timings.summary())
+
+    Phases are identified by their path, such as ``load_config/validate`` for
+    the validation done while loading the config. The time of a phase includes
+    the time of the phases nested in it. Work done in other processes, such as
+    files generated in parallel with ``max_workers``, is not recorded.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, PhaseTiming] = {}
+        """The time spent in each phase, by path, in the order they were first entered."""
+        self.file_keys: dict[str, dict[str, float]] = {}
+        """The time spent generating the files of each file key, by phase name."""
+        self.output_types: dict[str, dict[str, float]] = {}
+        """The time spent generating the files of each output type, by phase name."""
+        self.counters: dict[str, int] = {}
+        """Counters of the work done, by name."""
+        self._stack: list[str] = []
+
+    @contextlib.contextmanager
+    def activate(self) -> Generator["Timings", None, None]:
+        """Record timings in this object until the context exits.
+
+        Yields
+        ------
+        Timings
+            This object.
+        """
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Return the timings as JSON-serializable data.
+
+        Returns
+        -------
+        dict[str, Any]
+            The phases, the breakdowns by file key and output type, and the
+            counters. Times are in seconds.
+        """
+        return {
+            "phases": {path: {"seconds": phase.seconds, "calls": phase.calls} for path, phase in self.phases.items()},
+            "file_keys": self.file_keys,
+            "output_types": self.output_types,
+            "counters": self.counters,
+        }
+
+    def summary(self) -> str:
+        """Return a human-readable summary of the timings.
+
+        Returns
+        -------
+        str
+            The summary, with one line per phase, file key, output type and
+            counter.
+        """
+        lines = ["Phases:"]
+        for path, phase in self.phases.items():
+            depth = path.count("/")
+            name = "  " * depth + path.rsplit("/", 1)[-1]
+            lines.append(f"  {name:<40}{_format_seconds(phase.seconds)}{phase.calls:>10} calls")
+        for title, breakdown in [("Output types", self.output_types), ("File keys", self.file_keys)]:
+            if not breakdown:
+                continue
+            lines.append(f"{title}:")
+            for key, phases in sorted(breakdown.items(), key=lambda item: -sum(item[1].values())):
+                details = ", ".join(f"{name} {_format_seconds(seconds).strip()}" for name, seconds in phases.items())
+                lines.append(f"  {key:<40}{_format_seconds(sum(phases.values()))}  ({details})")
+        if self.counters:
+            lines.append("Counters:")
+            for name, value in self.counters.items():
+                lines.append(f"  {name:<40}{value:>12}")
+        return "\n".join(lines)
+
+    def _record(
+        self,
+        path: str,
+        seconds: float,
+        file_key: typing.Union[str, None],
+        output_type: typing.Union[str, None],
+    ) -> None:
+        phase = self.phases[path]
+        phase.seconds += seconds
+        phase.calls += 1
+        name = path.rsplit("/", 1)[-1]
+        for breakdown, key in [(self.file_keys, file_key), (self.output_types, output_type)]:
+            if key is not None:
+                phases = breakdown.setdefault(key, {})
+                phases[name] = phases.get(name, 0.0) + seconds
+
+
+_active: contextvars.ContextVar[typing.Union[Timings, None]] = contextvars.ContextVar("timings", default=None)
+
+
+def _format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:>10.1f} ms"
+
+
+@contextlib.contextmanager
+def phase(
+    name: str, *, file_key: typing.Union[str, None] = None, output_type: typing.Union[str, None] = None
+) -> Generator[None, None, None]:
+    # Record the time spent in the context, or the decorated function, as a phase
+    # nested in the current one. Phases of a single file are also added to the
+    # breakdowns by file key and output type.
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+
+    path = f"{timings._stack[-1]}/{name}" if timings._stack else name
+    timings.phases.setdefault(path, PhaseTiming())
+    timings._stack.append(path)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        timings._stack.pop()
+        timings._record(path, seconds, file_key, output_type)
+
+
+def count(name: str, value: int = 1) -> None:
+    # Add to a counter of the active Timings object, if any.
+    timings = _active.get()
+    if timings is not None:
+        timings.counters[name] = timings.counters.get(name, 0) + value
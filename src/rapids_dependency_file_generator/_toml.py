@@ -0,0 +1,250 @@
+"""Fast replacement of arrays in TOML documents.
+
+Replacing one array in a ``pyproject.toml`` file with tomlkit requires parsing
+and serializing the whole document, which is slow for large files. Instead,
+:func:`splice_array` scans the document just far enough to find the lines that
+define the array, and replaces only those, producing the same bytes as tomlkit
+would. Documents whose structure makes the location of the array ambiguous,
+such as ones defining the table with dotted keys or inline tables, are left to
+tomlkit.
+"""
+
+import re
+import typing
+
+__all__ = [
+    "splice_array",
+]
+
+_BARE_KEY = re.compile(r"[A-Za-z0-9_-]+")
+_BLANK = " \t"
+
+
+class _Ambiguous(Exception):
+    # Raised when the document cannot be handled without a full TOML parser.
+    pass
+
+
+def _skip_blank(contents: str, pos: int) -> int:
+    while pos < len(contents) and contents[pos] in _BLANK:
+        pos += 1
+    return pos
+
+
+def _line_end(contents: str, pos: int) -> int:
+    end = contents.find("\n", pos)
+    return len(contents) if end == -1 else end
+
+
+def _skip_string(contents: str, pos: int) -> int:
+    # Return the position after the string starting at pos.
+    quote = contents[pos]
+    if contents.startswith(quote * 3, pos):
+        end = pos + 3
+        while True:
+            end = contents.find(quote * 3, end)
+            if end == -1:
+                raise _Ambiguous
+            if quote == '"' and _is_escaped(contents, end):
+                end += 1
+                continue
+            end += 3
+            # Up to two quotes may directly precede the closing delimiter.
+            for _ in range(2):
+                if contents.startswith(quote, end):
+                    end += 1
+            return end
+
+    end = pos + 1
+    while True:
+        if end >= len(contents) or contents[end] == "\n":
+            raise _Ambiguous
+        if quote == '"' and contents[end] == "\\":
+            end += 2
+            continue
+        if contents[end] == quote:
+            return end + 1
+        end += 1
+
+
+def _is_escaped(contents: str, pos: int) -> bool:
+    backslashes = 0
+    while pos - backslashes - 1 >= 0 and contents[pos - backslashes - 1] == "\\":
+        backslashes += 1
+    return backslashes % 2 == 1
+
+
+def _skip_value(contents: str, pos: int) -> int:
+    # Return the position after the value starting at pos.
+    if pos >= len(contents):
+        raise _Ambiguous
+    if contents[pos] in "\"'":
+        return _skip_string(contents, pos)
+    if contents[pos] in "[{":
+        depth = 0
+        while pos < len(contents):
+            char = contents[pos]
+            if char in "\"'":
+                pos = _skip_string(contents, pos)
+                continue
+            if char == "#":
+                pos = _line_end(contents, pos)
+                continue
+            if char in "[{":
+                depth += 1
+            elif char in "]}":
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            pos += 1
+        raise _Ambiguous
+
+    # Numbers, booleans and dates end at a comment or the end of the line, and
+    # may contain spaces (as in "1979-05-27 07:32:00").
+    end = pos
+    line_end = _line_end(contents, pos)
+    while end < line_end and contents[end] != "#":
+        end += 1
+    while end > pos and contents[end - 1] in _BLANK + "\r":
+        end -= 1
+    if end == pos:
+        raise _Ambiguous
+    return end
+
+
+def _parse_key(key: str) -> tuple[str, ...]:
+    parts = tuple(part.strip(_BLANK) for part in key.split("."))
+    if not all(_BARE_KEY.fullmatch(part) for part in parts):
+        # Quoted keys may contain dots and other special characters.
+        raise _Ambiguous
+    return parts
+
+
+def _is_prefix(prefix: tuple[str, ...], path: tuple[str, ...]) -> bool:
+    return path[: len(prefix)] == prefix
+
+
+def _find_array(contents: str, table: tuple[str, ...], key: str) -> tuple[int, int, bool]:
+    # Return the span of the value of the array and whether it is followed by a
+    # comment.
+    target = (*table, key)
+    current_table: tuple[str, ...] = ()
+    table_found = False
+    found: typing.Union[tuple[int, int, bool], None] = None
+
+    pos = 0
+    while pos < len(contents):
+        pos = _skip_blank(contents, pos)
+        if pos >= len(contents):
+            break
+        char = contents[pos]
+        if char in "\r\n":
+            pos = _line_end(contents, pos) + 1
+            continue
+        if char == "#":
+            pos = _line_end(contents, pos)
+            continue
+
+        if char == "[":
+            array_of_tables = contents.startswith("[[", pos)
+            close = "]]" if array_of_tables else "]"
+            start = pos + len(close)
+            end = contents.find(close, start)
+            if end == -1 or "\n" in contents[start:end]:
+                raise _Ambiguous
+            header = _parse_key(contents[start:end])
+            if array_of_tables:
+                if _is_prefix(header, target):
+                    raise _Ambiguous
+                # Keys in arrays of tables can never define the target array.
+                current_table = (*header, "[]")
+            else:
+                current_table = header
+                if header == table:
+                    if table_found:
+                        raise _Ambiguous
+                    table_found = True
+            value_end = end + len(close)
+        else:
+            equals = contents.find("=", pos, _line_end(contents, pos))
+            if equals == -1:
+                raise _Ambiguous
+            parts = _parse_key(contents[pos:equals])
+            path = (*current_table, *parts)
+            value_start = _skip_blank(contents, equals + 1)
+            value_end = _skip_value(contents, value_start)
+            has_comment = contents.startswith("#", _skip_blank(contents, value_end))
+
+            if path == target:
+                if found is not None or len(parts) > 1 or contents[value_start] != "[":
+                    raise _Ambiguous
+                found = (value_start, value_end, has_comment)
+            elif _is_prefix(path, target) or _is_prefix(target, path):
+                # The table is defined by an inline table, or the key is a table.
+                raise _Ambiguous
+            elif len(parts) > 1 and _is_prefix(path[:-1], target):
+                # The table is defined by a dotted key.
+                raise _Ambiguous
+
+        # Only a comment may follow a header or a value on the same line.
+        rest = _skip_blank(contents, value_end)
+        line_end = _line_end(contents, rest)
+        if not (contents.startswith("#", rest) or contents[rest:line_end] in ("", "\r")):
+            raise _Ambiguous
+        pos = line_end + 1
+
+    if found is None or not table_found:
+        raise _Ambiguous
+    return found
+
+
+def splice_array(
+    contents: str, table: str, key: str, values: typing.Sequence[object], comment: str
+) -> typing.Union[str, None]:
+    """Replace an array of strings in a TOML document without parsing all of it.
+
+    The result is the same as replacing the array with tomlkit, using a
+    multi-line array with one value per line, followed by a comment.
+
+    Parameters
+    ----------
+    contents : str
+        The TOML document.
+    table : str
+        The dotted name of the table containing the array, such as
+        ``tool.rapids-build-backend``.
+    key : str
+        The key of the array in the table.
+    values : Sequence[object]
+        The new values of the array. Only strings are supported, and None is
+        returned for other values.
+    comment : str
+        The comment to put after the array.
+
+    Returns
+    -------
+    str | None
+        The modified document, or None if the array could not be located
+        unambiguously. This includes documents where the table or the key do
+        not exist yet.
+    """
+    if contents.startswith("\ufeff") or not all(isinstance(value, str) for value in values):
+        return None
+    try:
+        value_start, value_end, has_comment = _find_array(contents, _parse_key(table), key)
+    except _Ambiguous:
+        return None
+
+    line_end = _line_end(contents, value_end)
+    rest_of_line = contents[value_end:line_end]
+    carriage_return = "\r" if rest_of_line.endswith("\r") else ""
+    # tomlkit keeps the whitespace after a value, unless it is followed by a
+    # comment, which is replaced together with the whitespace before it.
+    trailing_whitespace = "" if has_comment else rest_of_line[: len(rest_of_line) - len(carriage_return)]
+
+    import tomlkit
+
+    array = "".join(f"    {tomlkit.item(value).as_string()},\n" for value in values)
+    return (
+        contents[:value_start] + f"[\n{array}] # {comment}{trailing_whitespace}{carriage_return}" + contents[line_end:]
+    )
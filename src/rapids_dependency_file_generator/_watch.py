@@ -0,0 +1,81 @@
+"""Polling of files for changes."""
+
+import os
+import sys
+import threading
+import typing
+
+__all__ = [
+    "watch",
+]
+
+_FileState = typing.Union[tuple[int, int, int], None]
+
+
+def _snapshot(paths: typing.Iterable[str]) -> dict[str, _FileState]:
+    snapshot: dict[str, _FileState] = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            snapshot[path] = None
+        else:
+            # Files replaced atomically get a new inode, even if the modification
+            # time does not change within the resolution of the file system.
+            snapshot[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return snapshot
+
+
+def watch(
+    get_paths: typing.Callable[[], typing.Iterable[str]],
+    on_change: typing.Callable[[], None],
+    *,
+    interval: float = 0.5,
+    debounce: float = 0.2,
+    stop: typing.Union[threading.Event, None] = None,
+) -> None:
+    """Call a function whenever any of a set of files changes.
+
+    The files are polled, so no platform-specific file system notifications are
+    needed.
+
+    Parameters
+    ----------
+    get_paths : Callable[[], Iterable[str]]
+        Returns the paths of the files to watch. It is called again after each
+        call to ``on_change``, so the set of files may change over time. Files
+        that do not exist are watched for being created.
+    on_change : Callable[[], None]
+        Called after the files change. Exceptions raised by it are reported on
+        stderr, and watching continues.
+    interval : float
+        The number of seconds between polls.
+    debounce : float
+        The number of seconds the files must stay unchanged after a change before
+        ``on_change`` is called, so that a burst of saves only triggers one call.
+    stop : threading.Event | None
+        If given, watching stops once this event is set. Otherwise, watching
+        continues until the process is interrupted.
+    """
+    if stop is None:
+        stop = threading.Event()
+
+    snapshot = _snapshot(get_paths())
+    while not stop.wait(interval):
+        current = _snapshot(snapshot)
+        if current == snapshot:
+            continue
+
+        while not stop.wait(debounce):
+            latest = _snapshot(snapshot)
+            if latest == current:
+                break
+            current = latest
+        else:
+            return
+
+        try:
+            on_change()
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        snapshot = _snapshot(get_paths())
@@ -0,0 +1,165 @@
+"""Writing of generated dependency files."""
+
+import os
+import stat
+import tempfile
+
+from ._constants import generated_file_header
+
+__all__ = [
+    "FileWriter",
+]
+
+# Generated files always start with the header, so only their beginning needs to be
+# read to recognize them.
+_HEADER_SEARCH_SIZE = 512
+
+
+def is_generated_file(file_path: str) -> bool:
+    """Check whether a file was generated by this generator.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the file to check.
+
+    Returns
+    -------
+    bool
+        True if the file exists and starts with the generated file header.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            return generated_file_header.encode() in f.read(_HEADER_SEARCH_SIZE)
+    except OSError:
+        return False
+
+
+def _has_contents(file_path: str, data: bytes) -> bool:
+    try:
+        # Comparing sizes first avoids reading files that have obviously changed.
+        if os.stat(file_path).st_size != len(data):
+            return False
+        with open(file_path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def _get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+class FileWriter:
+    """Write generated dependency files to disk.
+
+    Files are not written in place. Instead, each file is staged in a temporary
+    file in its target directory, and staged files are moved into place with
+    :func:`os.replace` when :meth:`commit` is called. Readers therefore never see
+    a partially written file, even if generation is interrupted.
+
+    Parameters
+    ----------
+    write_if_changed : bool
+        Whether to skip writing files whose current contents are identical to
+        the generated ones. This leaves the modification times of unchanged files
+        alone, so tools that watch them are not triggered needlessly.
+    all_or_nothing : bool
+        Whether a failed run should leave every file untouched. If ``False``, the
+        files that were generated successfully are still committed when another
+        file fails.
+    fsync : bool
+        Whether to flush staged files to disk before moving them into place, so
+        that a crash cannot leave an empty file behind.
+    """
+
+    def __init__(self, *, write_if_changed: bool = False, all_or_nothing: bool = False, fsync: bool = True):
+        self.write_if_changed = write_if_changed
+        self.all_or_nothing = all_or_nothing
+        self.fsync = fsync
+        self.written = 0
+        """The number of files that have been written."""
+        self.unchanged = 0
+        """The number of files that were skipped because they had not changed."""
+        # The temporary files staged for each file path.
+        self._pending: dict[str, str] = {}
+        self._umask = _get_umask()
+
+    def write(self, file_path: str, contents: str) -> None:
+        """Stage a generated file to be written when the writer is committed.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the file to write. Its parent directories are created if
+            they do not exist.
+        contents : str
+            The contents of the file.
+        """
+        # Write through symlinks instead of replacing them.
+        file_path = os.path.realpath(file_path)
+        data = contents.encode()
+        if self.write_if_changed and file_path not in self._pending and _has_contents(file_path, data):
+            self.unchanged += 1
+            return
+
+        output_dir = os.path.dirname(file_path)
+        os.makedirs(output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                mode = stat.S_IMODE(os.stat(file_path).st_mode)
+            except FileNotFoundError:
+                mode = 0o666 & ~self._umask
+            os.chmod(tmp_path, mode)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if file_path in self._pending:
+            os.unlink(self._pending[file_path])
+        else:
+            self.written += 1
+        self._pending[file_path] = tmp_path
+
+    def commit(self) -> None:
+        """Move all staged files into place."""
+        pending, self._pending = self._pending, {}
+        if self.fsync:
+            for tmp_path in pending.values():
+                fd = os.open(tmp_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+        for file_path, tmp_path in pending.items():
+            os.replace(tmp_path, file_path)
+
+    def discard(self) -> None:
+        """Delete all staged files without moving them into place."""
+        pending, self._pending = self._pending, {}
+        self.written -= len(pending)
+        for tmp_path in pending.values():
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def finish(self, succeeded: bool) -> None:
+        """Commit or discard the staged files at the end of a run.
+
+        Parameters
+        ----------
+        succeeded : bool
+            Whether every file in the run was generated successfully. If not, the
+            staged files are only committed if ``all_or_nothing`` is ``False``.
+        """
+        if succeeded or not self.all_or_nothing:
+            self.commit()
+        else:
+            self.discard()
@@ -0,0 +1,69 @@
+"""YAML loading and dumping using the fastest available implementation.
+
+PyYAML ships optional bindings to the libyaml C library, which are much faster
+than its pure-Python implementation. They are used when PyYAML was built with
+them, and the pure-Python loader and dumper are used otherwise.
+
+PyYAML is only imported the first time a document is loaded or dumped, so that
+commands which never read YAML, such as ``--version``, do not pay for it.
+"""
+
+import types
+import typing
+
+if typing.TYPE_CHECKING:
+    from yaml import SafeDumper, SafeLoader
+
+
+def _import_yaml() -> types.ModuleType:
+    import yaml
+
+    # SafeLoader and SafeDumper are set the first time PyYAML is imported, unless
+    # they have been replaced already.
+    if "SafeLoader" not in globals():
+        try:
+            from yaml import CSafeDumper, CSafeLoader
+
+            globals().update(SafeLoader=CSafeLoader, SafeDumper=CSafeDumper)
+        except ImportError:
+            globals().update(SafeLoader=yaml.SafeLoader, SafeDumper=yaml.SafeDumper)
+    return yaml
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in ("SafeLoader", "SafeDumper"):
+        _import_yaml()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load(stream: typing.Union[str, bytes, typing.IO]) -> typing.Any:
+    """Parse a YAML document, constructing only basic Python objects.
+
+    Parameters
+    ----------
+    stream : str | bytes | IO
+        The YAML document to parse.
+
+    Returns
+    -------
+    Any
+        The parsed document.
+    """
+    return _import_yaml().load(stream, Loader=SafeLoader)
+
+
+def dump(data: typing.Any) -> str:
+    """Serialize basic Python objects to a YAML document.
+
+    Parameters
+    ----------
+    data : Any
+        The data to serialize.
+
+    Returns
+    -------
+    str
+        The YAML document.
+    """
+    return _import_yaml().dump(data, Dumper=SafeDumper)
@@ -1,8 +1,50 @@
+import textwrap
+
 import pytest
 
 from rapids_dependency_file_generator._rapids_dependency_file_validator import SCHEMA
 
+CONFIG = textwrap.dedent(
+    """\
+    files:
+      test:
+        output: [conda, requirements]
+        matrix:
+          cuda: ["11.8", "12.0"]
+        includes: [test]
+      docs:
+        output: requirements
+        includes: [docs]
+    channels: [rapidsai]
+    dependencies:
+      test:
+        common:
+          - output_types: [conda, requirements]
+            packages: [pytest]
+        specific:
+          - output_types: requirements
+            matrices:
+              - matrix:
+                  cuda: "12.*"
+                packages: [cupy-cuda12x]
+              - matrix:
+                packages: [cupy-cuda11x]
+      docs:
+        common:
+          - output_types: requirements
+            packages: [sphinx]
+    """
+)
+
 
 @pytest.fixture(scope="session")
 def schema():
     return SCHEMA
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """A small config, with a file key with a matrix and one without, in ``tmp_path``."""
+    path = tmp_path / "dependencies.yaml"
+    path.write_text(CONFIG)
+    return path
@@ -0,0 +1,52 @@
+import json
+import pathlib
+import subprocess
+import sys
+
+BENCHMARKS_DIR = pathlib.Path(__file__).parent.parent / "benchmarks"
+
+
+def test_synthetic_config_is_valid(tmp_path):
+    subprocess.run(
+        [sys.executable, str(BENCHMARKS_DIR / "synthetic.py"), "--file-keys", "3", "--output-dir", str(tmp_path)],
+        check=True,
+    )
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from rapids_dependency_file_generator._cli import main; main(sys.argv[1:])",
+            "--config",
+            str(tmp_path / "dependencies.yaml"),
+        ],
+        check=True,
+    )
+    assert len(list((tmp_path / "output" / "requirements").iterdir())) == 3 * 3 * 3
+    assert "set0-pkg0>=1.0" in (tmp_path / "output" / "pyproject.toml").read_text()
+
+
+def test_benchmarks_report_json(tmp_path):
+    results_file = tmp_path / "results.json"
+    subprocess.run(
+        [
+            sys.executable,
+            str(BENCHMARKS_DIR / "run.py"),
+            "--preset",
+            "small",
+            "--scenario",
+            "make_dependency_files_stdout",
+            "--scenario",
+            "pyproject",
+            "--repeat",
+            "2",
+            "--output",
+            str(results_file),
+        ],
+        check=True,
+    )
+    results = json.loads(results_file.read_text())
+    assert [(result["preset"], result["scenario"]) for result in results["results"]] == [
+        ("small", "make_dependency_files_stdout"),
+        ("small", "pyproject"),
+    ]
+    assert all(len(result["times"]) == 2 for result in results["results"])
@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rapids_dependency_file_generator import _cache, _config
+from rapids_dependency_file_generator._cache import ConfigCache
+from rapids_dependency_file_generator._rapids_dependency_file_validator import UnusedDependencySetWarning
+
+def test_cache_hit_skips_parsing(tmp_path, config_file):
+    cache = ConfigCache(tmp_path / "cache")
+    expected = _config.load_config_from_file(config_file, cache=cache)
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    with mock.patch("rapids_dependency_file_generator._config._yaml.load") as mock_load, mock.patch(
+        "rapids_dependency_file_generator._config.validate_dependencies"
+    ) as mock_validate:
+        actual = _config.load_config_from_file(config_file, cache=cache)
+    mock_load.assert_not_called()
+    mock_validate.assert_not_called()
+    assert actual == expected
+
+
+def test_cache_hit_uses_requested_path(tmp_path, config_file):
+    cache = ConfigCache(tmp_path / "cache")
+    _config.load_config_from_file(config_file, cache=cache)
+
+    other_file = tmp_path / "other" / "dependencies.yaml"
+    other_file.parent.mkdir()
+    other_file.write_text(config_file.read_text())
+    assert _config.load_config_from_file(other_file, cache=cache).path == Path(other_file)
+
+
+def test_cache_key_depends_on_version(tmp_path):
+    cache = ConfigCache(tmp_path)
+    key = cache.key(b"contents")
+    assert cache.key(b"other contents") != key
+    with mock.patch.object(_cache, "__version__", "0.0.0"):
+        assert cache.key(b"contents") != key
+
+
+def test_cache_hit_warns_on_unused_dependency_sets(tmp_path, config_file):
+    config_file.write_text(config_file.read_text() + "  unused:\n    common: []\n")
+    cache = ConfigCache(tmp_path / "cache")
+    with pytest.warns(UnusedDependencySetWarning):
+        _config.load_config_from_file(config_file, cache=cache)
+    with pytest.warns(UnusedDependencySetWarning):
+        _config.load_config_from_file(config_file, cache=cache)
+
+
+def test_corrupt_entry_is_a_miss(tmp_path, config_file):
+    cache = ConfigCache(tmp_path / "cache")
+    expected = _config.load_config_from_file(config_file, cache=cache)
+    (entry,) = (tmp_path / "cache").iterdir()
+    entry.write_bytes(b"not a pickle")
+
+    assert cache.get(config_file.read_bytes(), config_file) is None
+    assert not entry.exists()
+    assert _config.load_config_from_file(config_file, cache=cache) == expected
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ConfigCache(tmp_path)
+    config = _config.Config(path=Path("dependencies.yaml"))
+    cache.put(b"first", config)
+    entry_size = os.path.getsize(cache._entry_path(b"first"))
+    cache.max_size = 2 * entry_size
+
+    cache.put(b"second", config)
+    os.utime(cache._entry_path(b"first"), (0, 0))
+    os.utime(cache._entry_path(b"second"), (1, 1))
+    # Using an entry makes it the most recently used one.
+    assert cache.get(b"first", "dependencies.yaml") == config
+
+    cache.put(b"third", config)
+    assert cache.get(b"first", "dependencies.yaml") == config
+    assert cache.get(b"second", "dependencies.yaml") is None
+    assert cache.get(b"third", "dependencies.yaml") == config
+
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unusable_cache_directory_is_skipped(tmp_path, config_file):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    cache = ConfigCache(not_a_directory / "cache")
+
+    with pytest.warns(RuntimeWarning) as record:
+        expected = _config.load_config_from_file(config_file, cache=cache)
+    assert [str(w.message).split(" the ")[0] for w in record] == ["Not reading from", "Not writing to"]
+    with pytest.warns(RuntimeWarning, match="Not reading from the config cache"):
+        assert cache.get(config_file.read_bytes(), config_file) is None
+    assert expected == _config.load_config_from_file(config_file)
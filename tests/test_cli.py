@@ -1,10 +1,13 @@
 import contextlib
 import os.path
+import pstats
+import sys
+import types
 from textwrap import dedent
 
 import pytest
 
-from rapids_dependency_file_generator._cli import generate_matrix, main, validate_args
+from rapids_dependency_file_generator._cli import expand_config_paths, generate_matrix, main, validate_args
 from rapids_dependency_file_generator._rapids_dependency_file_validator import UnusedDependencySetWarning
 
 
@@ -235,3 +238,186 @@ def test_warnings(tmp_path, extra_args, context):
 
     with context:
         main(["--config", config_file, *extra_args])
+
+
+def test_write_if_changed(tmp_path, capsys):
+    config_file = os.path.join(tmp_path, "dependencies.yaml")
+    with open(config_file, "w") as f:
+        f.write(dedent("""
+        files:
+          all:
+            output: [conda, requirements]
+            matrix:
+              cuda: ["11.8", "12.5"]
+            includes: [a]
+        channels: []
+        dependencies:
+          a:
+            common:
+              - output_types: [conda, requirements]
+                packages: [numpy]
+        """))
+
+    main(["--config", config_file, "--write-if-changed"])
+    assert capsys.readouterr().err == "4 files written, 0 unchanged\n"
+
+    requirements_file = os.path.join(tmp_path, "python", "requirements_all_cuda-118.txt")
+    with open(requirements_file, "a") as f:
+        f.write("scipy\n")
+    main(["--config", config_file, "--write-if-changed"])
+    assert capsys.readouterr().err == "1 files written, 3 unchanged\n"
+
+
+@pytest.mark.parametrize("all_or_nothing", [False, True])
+def test_all_or_nothing(tmp_path, all_or_nothing):
+    config_file = os.path.join(tmp_path, "dependencies.yaml")
+    with open(config_file, "w") as f:
+        f.write(dedent("""
+        files:
+          good:
+            output: requirements
+            includes: [a]
+          bad:
+            output: requirements
+            matrix:
+              cuda: ["10.0"]
+            includes: [a, b]
+        channels: []
+        dependencies:
+          a:
+            common:
+              - output_types: [requirements]
+                packages: [numpy]
+          b:
+            specific:
+              - output_types: [requirements]
+                matrices:
+                  - matrix:
+                      cuda: "12.*"
+                    packages: [cupy]
+        """))
+
+    with pytest.raises(ValueError):
+        main(["--config", config_file, *(["--all-or-nothing"] if all_or_nothing else [])])
+    assert os.path.exists(os.path.join(tmp_path, "python", "requirements_good.txt")) != all_or_nothing
+
+
+@pytest.mark.parametrize("profiler", ["auto", "cprofile"])
+def test_profile(tmp_path, monkeypatch, profiler):
+    # Without pyinstrument, "auto" falls back to cProfile.
+    monkeypatch.setitem(sys.modules, "pyinstrument", None)
+    config_file = os.path.join(tmp_path, "dependencies.yaml")
+    with open(config_file, "w") as f:
+        f.write(dedent("""
+        files:
+          all:
+            output: requirements
+            includes: [a]
+        channels: []
+        dependencies:
+          a:
+            common:
+              - output_types: [requirements]
+                packages: [numpy]
+        """))
+
+    profile_file = os.path.join(tmp_path, "profile.pstats")
+    main(["--config", config_file, "--profile", profile_file, "--profiler", profiler])
+    assert os.path.exists(os.path.join(tmp_path, "python", "requirements_all.txt"))
+    functions = {function_name for _, _, function_name in pstats.Stats(profile_file).stats}
+    assert "make_dependency_files" in functions
+
+    with pytest.raises(ImportError):
+        main(["--config", config_file, "--profile", profile_file, "--profiler", "pyinstrument"])
+
+
+def test_profile_with_pyinstrument(tmp_path, monkeypatch):
+    calls = []
+
+    class Session:
+        def save(self, path):
+            calls.append(("save", path))
+
+    class Profiler:
+        def start(self):
+            calls.append("start")
+
+        def stop(self):
+            calls.append("stop")
+            return Session()
+
+    monkeypatch.setitem(sys.modules, "pyinstrument", types.SimpleNamespace(Profiler=Profiler))
+    profile_file = os.path.join(tmp_path, "profile.pyisession")
+    main(["--version", "--profile", profile_file])
+    assert calls == ["start", "stop", ("save", profile_file)]
+
+
+BATCH_CONFIG = dedent("""
+files:
+  all:
+    output: requirements
+    includes: [a]
+channels: []
+dependencies:
+  a:
+    common:
+      - output_types: [requirements]
+        packages: [numpy]
+""")
+
+
+def write_repos(tmp_path, names):
+    config_files = []
+    for name in names:
+        os.makedirs(tmp_path / name)
+        config_files.append(str(tmp_path / name / "dependencies.yaml"))
+        with open(config_files[-1], "w") as f:
+            f.write(BATCH_CONFIG)
+    return config_files
+
+
+def test_expand_config_paths(tmp_path):
+    config_files = write_repos(tmp_path, ["a", "b", "c"])
+    list_file = tmp_path / "configs.txt"
+    list_file.write_text("# repositories\nc/dependencies.yaml\n\n*/dependencies.yaml\n")
+
+    assert validate_args(["--config", config_files[0]]).configs == [config_files[0]]
+    assert expand_config_paths([config_files[1], f"@{list_file}"]) == [
+        config_files[1],
+        config_files[2],
+        config_files[0],
+    ]
+    with pytest.raises(ValueError, match="No config files match"):
+        expand_config_paths([str(tmp_path / "missing" / "*.yaml")])
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_batch(tmp_path, capsys, jobs):
+    config_files = write_repos(tmp_path, ["a", "b", "c"])
+    with open(config_files[1], "w") as f:
+        f.write(BATCH_CONFIG.replace("includes: [a]", "includes: [missing]"))
+
+    with pytest.raises(ValueError, match=r"1 of 3 config files could not be processed:\n - .*b/dependencies.yaml: "):
+        main(["--config", str(tmp_path / "*" / "dependencies.yaml"), "--jobs", jobs, "--write-if-changed"])
+    for name in ["a", "c"]:
+        assert os.path.exists(tmp_path / name / "python" / "requirements_all.txt")
+    if jobs == "1":
+        assert capsys.readouterr().err.splitlines() == [
+            f"{config_files[0]}: 1 files written, 0 unchanged",
+            f"{config_files[2]}: 1 files written, 0 unchanged",
+        ]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--watch"],
+        ["--clean", "."],
+        ["--manifest", "manifest.json"],
+        ["--file-key", "all", "--output", "requirements", "--matrix", ""],
+    ],
+)
+def test_batch_rejects_per_config_arguments(tmp_path, args):
+    config_files = write_repos(tmp_path, ["a", "b"])
+    with pytest.raises(ValueError, match="multiple config files"):
+        validate_args(["--config", config_files[0], "--config", config_files[1], *args])
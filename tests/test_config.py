@@ -1,10 +1,13 @@
+import itertools
 import tempfile
 import textwrap
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
 from rapids_dependency_file_generator import _config, _constants
+from rapids_dependency_file_generator._rapids_dependency_file_generator import should_use_specific_entry
 
 
 @pytest.mark.parametrize(
@@ -424,3 +427,84 @@ def test_load_config_from_file(input, output):
         else:
             output.path = Path(f.name)
             assert _config.load_config_from_file(f.name) == output
+
+
+def test_parse_config_can_skip_validation():
+    invalid = {"files": {}, "dependencies": {}, "invalid": True}
+    with pytest.raises(RuntimeError):
+        _config.parse_config(invalid, "dependencies.yaml")
+    with mock.patch("rapids_dependency_file_generator._config.validate_dependencies") as mock_validate:
+        assert _config.parse_config(invalid, "dependencies.yaml", validate=False) == _config.Config(
+            path=Path("dependencies.yaml"), channels=[]
+        )
+    mock_validate.assert_not_called()
+
+
+def _reference_match(matchers, matrix_combo):
+    fallback = None
+    for matcher in matchers:
+        if not matcher.matrix:
+            fallback = matcher
+            continue
+        if should_use_specific_entry(matrix_combo, matcher.matrix):
+            return matcher
+    return fallback
+
+
+def test_specific_dependencies_match():
+    matchers = [
+        _config.MatrixMatcher(matrix={"cuda": "12.*", "arch": "x86_64"}, packages=["glob-cuda12-x86"]),
+        _config.MatrixMatcher(matrix={"cuda": "12.0"}, packages=["exact-cuda120"]),
+        _config.MatrixMatcher(matrix={"cuda": "12.0", "arch": "x86_64"}, packages=["shadowed"]),
+        _config.MatrixMatcher(matrix={}, packages=["first-fallback"]),
+        _config.MatrixMatcher(matrix={"cuda": "11.[48]"}, packages=["glob-cuda11"]),
+        _config.MatrixMatcher(matrix={"cuda": "11.8", "py": "3.10"}, packages=["shadowed-too"]),
+        _config.MatrixMatcher(matrix={"py": "3.10"}, packages=["exact-py310"]),
+        _config.MatrixMatcher(matrix={"cuda": "12.0"}, packages=["duplicate"]),
+        _config.MatrixMatcher(matrix={}, packages=["last-fallback"]),
+    ]
+    specific = _config.SpecificDependencies(output_types={_config.Output.CONDA}, matrices=matchers)
+
+    def packages(matrix_combo):
+        return specific.match(matrix_combo).packages
+
+    assert packages({"cuda": "12.0", "arch": "x86_64"}) == ["glob-cuda12-x86"]
+    assert packages({"cuda": "12.0", "arch": "aarch64"}) == ["exact-cuda120"]
+    assert packages({"cuda": "11.8", "py": "3.10"}) == ["glob-cuda11"]
+    assert packages({"cuda": "11.2", "py": "3.10"}) == ["exact-py310"]
+    assert packages({"cuda": "11.2", "py": "3.11"}) == ["last-fallback"]
+    assert packages({"cuda": None, "py": None}) == ["last-fallback"]
+    assert packages({"cuda": "", "py": ""}) == ["last-fallback"]
+    assert _config.SpecificDependencies(output_types=set(), matrices=matchers[:3]).match({"cuda": "11.8"}) is None
+
+    for cuda, arch, py in itertools.product(
+        ["11.2", "11.4", "11.8", "12.0", "12.5", "", None], ["x86_64", "aarch64", None], ["3.10", "3.11", None]
+    ):
+        matrix_combo = {"cuda": cuda, "arch": arch, "py": py}
+        assert specific.match(matrix_combo) is _reference_match(matchers, matrix_combo), matrix_combo
+
+
+def test_parse_config_reports_all_duplicate_matrix_entries():
+    config = {
+        "files": {"all": {"output": "none", "includes": ["a", "b"]}},
+        "dependencies": {
+            name: {
+                "specific": [
+                    {
+                        "output_types": "conda",
+                        "matrices": [
+                            {"matrix": {"cuda": "11.8"}, "packages": []},
+                            {"matrix": {"cuda": "11.8"}, "packages": ["pkg"]},
+                        ],
+                    }
+                ]
+            }
+            for name in ["a", "b"]
+        },
+    }
+    with pytest.raises(ValueError) as excinfo:
+        _config.parse_config(config, "dependencies.yaml")
+    assert str(excinfo.value) == "\n".join(
+        f"All matrix entries must be unique. Found duplicates in '{name}':\n - {{'cuda': '11.8'}}\n - {{'cuda': '11.8'}}"
+        for name in ["a", "b"]
+    )
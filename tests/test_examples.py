@@ -54,7 +54,8 @@ def invalid_example_dir(request):
     return request.param
 
 
-def test_examples(example_dir):
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_examples(example_dir, jobs):
     expected_dir = example_dir.joinpath("output", "expected")
     actual_dir = example_dir.joinpath("output", "actual")
     dep_file_path = example_dir.joinpath("dependencies.yaml")
@@ -74,6 +75,8 @@ def test_examples(example_dir):
         str(dep_file_path),
         "--clean",
         str(example_dir.joinpath("output", "actual")),
+        "--jobs",
+        str(jobs),
     ]
 
     # Prepend channels for the prepend_channels tests
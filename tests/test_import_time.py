@@ -0,0 +1,56 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+CURRENT_DIR = pathlib.Path(__file__).parent
+CONFIG_FILE = CURRENT_DIR / "examples" / "integration" / "dependencies.yaml"
+REQUIREMENTS_TO_STDOUT = ["--file-key", "test", "--output", "requirements", "--matrix", "cuda=11.8"]
+
+
+def imported_modules(*args):
+    # Run the CLI with -X importtime, which reports every imported module on stderr
+    # as "import time: <self> | <cumulative> | <indented module name>".
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys; from rapids_dependency_file_generator._cli import main; main(sys.argv[1:])",
+            *args,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {line.rsplit("|", 1)[1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+
+@pytest.mark.parametrize(
+    ["args", "unexpected_modules"],
+    [
+        pytest.param(["--version"], {"yaml", "tomlkit", "jsonschema"}, id="version"),
+        pytest.param(
+            ["--config", str(CONFIG_FILE), *REQUIREMENTS_TO_STDOUT],
+            {"tomlkit"},
+            id="requirements",
+        ),
+        pytest.param(
+            ["--config", str(CONFIG_FILE), *REQUIREMENTS_TO_STDOUT, "--skip-validation"],
+            {"tomlkit", "jsonschema"},
+            id="requirements-without-validation",
+        ),
+    ],
+)
+def test_heavy_dependencies_are_imported_lazily(args, unexpected_modules):
+    modules = imported_modules(*args)
+    assert "rapids_dependency_file_generator._cli" in modules
+    assert not modules & unexpected_modules
+
+
+def test_cached_config_is_not_validated_again(tmp_path):
+    args = ["--config", str(CONFIG_FILE), *REQUIREMENTS_TO_STDOUT, "--cache-dir", str(tmp_path)]
+    assert "jsonschema" in imported_modules(*args)
+    assert not imported_modules(*args) & {"yaml", "jsonschema"}
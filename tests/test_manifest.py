@@ -0,0 +1,224 @@
+import json
+import os
+import pathlib
+import shutil
+
+import pytest
+
+from rapids_dependency_file_generator import _config
+from rapids_dependency_file_generator._cli import main
+from rapids_dependency_file_generator._manifest import MANIFEST_FILE_NAME, InputGraph, Manifest
+from rapids_dependency_file_generator._rapids_dependency_file_generator import make_dependency_files
+
+
+def generate(config_file, manifest, **kwargs):
+    parsed_config = _config.load_config_from_file(config_file)
+    make_dependency_files(
+        parsed_config=parsed_config,
+        file_keys=kwargs.pop("file_keys", list(parsed_config.files)),
+        output=kwargs.pop("output", None),
+        matrix=kwargs.pop("matrix", None),
+        prepend_channels=[],
+        to_stdout=False,
+        manifest=manifest,
+        incremental=kwargs.pop("incremental", False),
+    )
+
+
+def test_manifest_records_generated_files(tmp_path, config_file):
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    generate(config_file, Manifest.load(manifest_file))
+
+    data = json.loads(manifest_file.read_text())
+    assert sorted(data["files"]) == [
+        "conda/environments/test_cuda-118.yaml",
+        "conda/environments/test_cuda-120.yaml",
+        "python/requirements_docs.txt",
+        "python/requirements_test_cuda-118.txt",
+        "python/requirements_test_cuda-120.txt",
+    ]
+    entry = data["files"]["python/requirements_docs.txt"]
+    assert entry["file_key"] == "docs"
+    assert entry["output"] == "requirements"
+
+    manifest = Manifest.load(manifest_file)
+    assert set(manifest.entries) == {str(tmp_path / file_path) for file_path in data["files"]}
+
+
+def test_manifest_deletes_files_that_are_no_longer_generated(tmp_path, config_file):
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    generate(config_file, Manifest.load(manifest_file))
+    config_file.write_text(
+        config_file.read_text()
+        .replace('cuda: ["11.8", "12.0"]', 'cuda: ["12.0"]')
+        .replace("  docs:\n    output: requirements\n    includes: [docs]\n", "")
+        .split("  docs:\n")[0]
+    )
+
+    generate(config_file, Manifest.load(manifest_file))
+    assert not (tmp_path / "conda" / "environments" / "test_cuda-118.yaml").exists()
+    assert not (tmp_path / "python" / "requirements_test_cuda-118.txt").exists()
+    assert not (tmp_path / "python" / "requirements_docs.txt").exists()
+    assert (tmp_path / "python" / "requirements_test_cuda-120.txt").exists()
+    assert sorted(json.loads(manifest_file.read_text())["files"]) == [
+        "conda/environments/test_cuda-120.yaml",
+        "python/requirements_test_cuda-120.txt",
+    ]
+
+
+def test_manifest_keeps_files_on_partial_regeneration(tmp_path, config_file):
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    generate(config_file, Manifest.load(manifest_file))
+
+    generate(
+        config_file,
+        Manifest.load(manifest_file),
+        file_keys=["test"],
+        output={_config.Output.REQUIREMENTS},
+        matrix={"cuda": ["12.0"]},
+    )
+    assert (tmp_path / "python" / "requirements_test_cuda-118.txt").exists()
+    assert len(Manifest.load(manifest_file).entries) == 5
+
+
+def test_manifest_does_not_delete_modified_files(tmp_path, config_file):
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    generate(config_file, Manifest.load(manifest_file))
+    taken_over = tmp_path / "python" / "requirements_docs.txt"
+    taken_over.write_text("numpy\n")
+
+    Manifest.load(manifest_file).delete_outputs()
+    assert taken_over.read_text() == "numpy\n"
+    assert not (tmp_path / "python" / "requirements_test_cuda-120.txt").exists()
+
+
+def test_manifest_records_inputs_of_every_file_key_editing_a_pyproject(tmp_path):
+    examples_dir = pathlib.Path(__file__).parent / "examples" / "overlapping-deps"
+    config_file = tmp_path / "dependencies.yaml"
+    shutil.copyfile(examples_dir / "dependencies.yaml", config_file)
+    pyproject_file = tmp_path / "output" / "actual" / "pyproject.toml"
+    pyproject_file.parent.mkdir(parents=True)
+    pyproject_file.write_text("[build-system]\nrequires = []\n\n[tool.rapids-build-backend]\nrequires = []\n")
+
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    generate(config_file, Manifest.load(manifest_file), file_keys=["build_deps", "even_more_build_deps"])
+    (entry,) = json.loads(manifest_file.read_text())["files"].values()
+    assert entry["file_key"] == "even_more_build_deps"
+    assert sorted(entry["inputs"]) == [
+        "dependencies.depends_on_numpy",
+        "dependencies.depends_on_pandas",
+        "dependencies.rapids_build_skbuild",
+        "files.build_deps",
+        "files.even_more_build_deps",
+        "matrix",
+    ]
+
+
+def test_clean_uses_manifest(tmp_path, config_file, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main(["--config", str(config_file), "--manifest"])
+    assert (tmp_path / MANIFEST_FILE_NAME).exists()
+
+    # A generated file that is not in the manifest is not searched for.
+    unlisted = tmp_path / "other" / "requirements.txt"
+    unlisted.parent.mkdir()
+    (tmp_path / "python" / "requirements_docs.txt").rename(unlisted)
+    (tmp_path / "python" / "requirements_test_cuda-118.txt").write_text("stale\n")
+
+    main(["--config", str(config_file), "--manifest", "--clean"])
+    assert unlisted.exists()
+    assert (tmp_path / "python" / "requirements_docs.txt").exists()
+    assert (tmp_path / "python" / "requirements_test_cuda-118.txt").read_text() != "stale\n"
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        "{broken",
+        '{"version": 1}',
+        "[]",
+        '{"version": 1, "files": {"python/requirements_docs.txt": {"file_key": "docs", "output": "bogus"}}}',
+        b"\xff",
+    ],
+)
+def test_corrupt_manifest_is_ignored(tmp_path, config_file, monkeypatch, contents):
+    monkeypatch.chdir(tmp_path)
+    main(["--config", str(config_file)])
+    stale = tmp_path / "other" / "requirements.txt"
+    stale.parent.mkdir()
+    stale.write_text((tmp_path / "python" / "requirements_docs.txt").read_text())
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    if isinstance(contents, bytes):
+        manifest_file.write_bytes(contents)
+    else:
+        manifest_file.write_text(contents)
+
+    with pytest.warns(RuntimeWarning, match="Ignoring corrupt manifest"):
+        assert Manifest.load(manifest_file).entries == {}
+
+    # Generated files are searched for instead, and the manifest is written again.
+    with pytest.warns(RuntimeWarning, match="Ignoring corrupt manifest"):
+        main(["--config", str(config_file), "--manifest", "--clean"])
+    assert not stale.exists()
+    assert len(Manifest.load(manifest_file).entries) == 5
+
+
+def mtimes(tmp_path):
+    return {p.relative_to(tmp_path).as_posix(): p.stat().st_mtime_ns for p in tmp_path.glob("*/**/*.*")}
+
+
+def test_incremental_generation(tmp_path, config_file):
+    manifest_file = tmp_path / MANIFEST_FILE_NAME
+    generate(config_file, Manifest.load(manifest_file), incremental=True)
+    for file_path in tmp_path.glob("*/**/*.*"):
+        os.utime(file_path, ns=(0, 0))
+
+    # Nothing changed
+    generate(config_file, Manifest.load(manifest_file), incremental=True)
+    assert set(mtimes(tmp_path).values()) == {0}
+
+    # A dependency set only included by one file key
+    config_file.write_text(config_file.read_text().replace("[sphinx]", "[sphinx, myst-parser]"))
+    generate(config_file, Manifest.load(manifest_file), incremental=True)
+    assert [path for path, mtime in mtimes(tmp_path).items() if mtime != 0] == ["python/requirements_docs.txt"]
+    assert "myst-parser" in (tmp_path / "python" / "requirements_docs.txt").read_text()
+
+    # Channels are only read by Conda environment files
+    for file_path in tmp_path.glob("*/**/*.*"):
+        os.utime(file_path, ns=(0, 0))
+    config_file.write_text(config_file.read_text().replace("[rapidsai]", "[rapidsai, conda-forge]"))
+    generate(config_file, Manifest.load(manifest_file), incremental=True)
+    assert sorted(path for path, mtime in mtimes(tmp_path).items() if mtime != 0) == [
+        "conda/environments/test_cuda-118.yaml",
+        "conda/environments/test_cuda-120.yaml",
+    ]
+
+    # Modified and deleted files are generated again
+    for file_path in tmp_path.glob("*/**/*.*"):
+        os.utime(file_path, ns=(0, 0))
+    (tmp_path / "python" / "requirements_test_cuda-118.txt").write_text("numpy\n")
+    (tmp_path / "python" / "requirements_test_cuda-120.txt").unlink()
+    generate(config_file, Manifest.load(manifest_file), incremental=True)
+    assert sorted(path for path, mtime in mtimes(tmp_path).items() if mtime != 0) == [
+        "python/requirements_test_cuda-118.txt",
+        "python/requirements_test_cuda-120.txt",
+    ]
+    assert "numpy\n" != (tmp_path / "python" / "requirements_test_cuda-118.txt").read_text()
+
+
+def test_incremental_generation_requires_manifest(config_file):
+    with pytest.raises(ValueError, match="requires a manifest"):
+        generate(config_file, None, incremental=True)
+
+
+def test_input_graph(config_file):
+    parsed_config = _config.load_config_from_file(config_file)
+    graph = InputGraph(parsed_config, ["rapidsai"])
+    conda_inputs = graph.inputs("test", _config.Output.CONDA, {"cuda": "11.8"})
+    assert sorted(conda_inputs) == ["channels", "dependencies.test", "files.test", "matrix"]
+    requirements_inputs = graph.inputs("test", _config.Output.REQUIREMENTS, {"cuda": "11.8"})
+    assert sorted(requirements_inputs) == ["dependencies.test", "files.test", "matrix"]
+    assert graph.inputs("test", _config.Output.REQUIREMENTS, {"cuda": "12.0"})["matrix"] != conda_inputs["matrix"]
+    # A separately parsed config has the same hashes.
+    other_graph = InputGraph(_config.load_config_from_file(config_file), ["rapidsai"])
+    assert other_graph.inputs("test", _config.Output.CONDA, {"cuda": "11.8"}) == conda_inputs
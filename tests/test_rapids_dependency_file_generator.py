@@ -9,9 +9,15 @@ import re
 from rapids_dependency_file_generator import _config
 from rapids_dependency_file_generator._constants import cli_name
 from rapids_dependency_file_generator._rapids_dependency_file_generator import (
+    HEADER,
+    _DependencyCollection,
+    DependencyResolver,
     dedupe,
+    delete_existing_files,
+    generate,
     make_dependency_file,
     make_dependency_files,
+    resolve_dependencies,
     should_use_specific_entry,
 )
 
@@ -187,6 +193,32 @@ def test_make_dependency_files_requirements_and_constraints_to_stdout_with_multi
     # should contain exactly the expected dependencies, sorted alphabetically, with no duplicates
     assert reqs_list == ["numpy>=2.0", "pandas<3.0", "rapids-build-backend>=0.3.1", "scikit-build-core[pyproject]>=0.9.0"]
 
+def test_dependency_collection_merges_without_aliasing():
+    pip_deps = ["b", "a"]
+    collection = _DependencyCollection()
+    collection.update(["y", {"pip": pip_deps}])
+    collection.update(["x", "y", {"pip": ["c", "a"]}])
+    assert collection.deps_list == ["x", "y", {"pip": ["a", "b", "c"]}]
+    assert pip_deps == ["b", "a"]
+
+
+def test_make_dependency_files_to_stdout_with_multiple_file_keys_renders_once(capsys):
+    current_dir = pathlib.Path(__file__).parent
+    with mock.patch(
+        "rapids_dependency_file_generator._rapids_dependency_file_generator.make_dependency_file",
+        wraps=make_dependency_file,
+    ) as mock_make_dependency_file:
+        make_dependency_files(
+            parsed_config=_config.load_config_from_file(current_dir / "examples" / "overlapping-deps" / "dependencies.yaml"),
+            file_keys=["test_with_sklearn", "test_deps", "even_more_test_deps"],
+            output={_config.Output.REQUIREMENTS},
+            matrix={"py": ["4.7"]},
+            prepend_channels=[],
+            to_stdout=True,
+        )
+    mock_make_dependency_file.assert_called_once()
+    assert capsys.readouterr().out.count(HEADER) == 1
+
 def test_make_dependency_files_conda_to_stdout_with_multiple_file_keys_works(capsys):
 
     current_dir = pathlib.Path(__file__).parent
@@ -244,3 +276,226 @@ def test_should_use_specific_entry():
     specific_entry = {"cuda": "11.5", "arch": "x86_64"}
     result = should_use_specific_entry(matrix_combo, specific_entry)
     assert result is True
+
+
+def test_dependency_resolver_caches_shared_dependency_sets(capsys):
+    current_dir = pathlib.Path(__file__).parent
+    parsed_config = _config.load_config_from_file(current_dir / "examples" / "overlapping-deps" / "dependencies.yaml")
+    resolver = DependencyResolver(parsed_config)
+
+    first = resolver.resolve("test_python", _config.Output.CONDA, {"py": "4.7", "arch": "x86_64"})
+    assert (resolver.hits, resolver.misses) == (0, 1)
+    # The order of keys in the matrix combination does not matter.
+    assert resolver.resolve("test_python", _config.Output.CONDA, {"arch": "x86_64", "py": "4.7"}) is first
+    assert (resolver.hits, resolver.misses) == (1, 1)
+    resolver.resolve("test_python", _config.Output.REQUIREMENTS, {"py": "4.7", "arch": "x86_64"})
+    assert (resolver.hits, resolver.misses) == (1, 2)
+
+    make_dependency_files(
+        parsed_config=parsed_config,
+        file_keys=["test_with_sklearn", "test_deps", "even_more_test_deps"],
+        output={_config.Output.CONDA},
+        matrix={"py": ["4.7"]},
+        prepend_channels=[],
+        to_stdout=True,
+        resolver=resolver,
+    )
+    assert resolver.hits > 1
+    assert resolver.hits + resolver.misses == 3 + sum(
+        len(parsed_config.files[key].includes) for key in ["test_with_sklearn", "test_deps", "even_more_test_deps"]
+    )
+
+    with pytest.raises(ValueError, match="The resolver must have been created for the same parsed_config."):
+        make_dependency_files(
+            parsed_config=_config.load_config_from_file(parsed_config.path),
+            file_keys=["test_deps"],
+            output={_config.Output.CONDA},
+            matrix={"py": ["4.7"]},
+            prepend_channels=[],
+            to_stdout=True,
+            resolver=resolver,
+        )
+
+
+def test_make_dependency_files_in_parallel_aggregates_errors(tmp_path):
+    config_file = tmp_path / "dependencies.yaml"
+    config_file.write_text(
+        """\
+files:
+  good:
+    output: requirements
+    includes: [common]
+  bad_cuda:
+    output: requirements
+    matrix:
+      cuda: ["10.0"]
+    includes: [common, specific]
+  bad_arch:
+    output: conda
+    matrix:
+      arch: [ppc64le]
+    includes: [specific]
+dependencies:
+  common:
+    common:
+      - output_types: [requirements]
+        packages: [numpy]
+  specific:
+    specific:
+      - output_types: [requirements, conda]
+        matrices:
+          - matrix:
+              cuda: "12.*"
+            packages: [cupy]
+"""
+    )
+    with pytest.raises(ValueError, match="2 dependency files could not be generated") as excinfo:
+        make_dependency_files(
+            parsed_config=_config.load_config_from_file(config_file),
+            file_keys=["good", "bad_cuda", "bad_arch"],
+            output=None,
+            matrix=None,
+            prepend_channels=[],
+            to_stdout=False,
+            max_workers=2,
+        )
+    assert "No matching matrix found in 'specific' for: {'cuda': '10.0'}" in str(excinfo.value)
+    assert "No matching matrix found in 'specific' for: {'arch': 'ppc64le'}" in str(excinfo.value)
+    # Files that could be generated are still written.
+    assert (tmp_path / "python" / "requirements_good.txt").read_text().endswith("numpy\n")
+
+
+def test_delete_existing_files(tmp_path):
+    generated = f"{HEADER}\n# To make changes, edit dependencies.yaml.\nnumpy\n"
+    files = {
+        "requirements.txt": generated,
+        "conda/environments/all.yaml": generated,
+        "python/pkg/requirements_test.txt": generated,
+        "python/pkg/pyproject.toml": generated,
+        "python/pkg/notes.txt": "not generated\n",
+        "python/pkg/late_header.txt": "x" * 1024 + generated,
+        "python/pkg/binary.yaml": "\udcff",
+        ".git/objects/requirements.txt": generated,
+        "node_modules/pkg/env.yaml": generated,
+        "cpp/build/requirements.txt": generated,
+        "envs/dev/conda-meta/history": "",
+        "envs/dev/env.yaml": generated,
+        "envs/dev/lib/requirements.txt": generated,
+        "docs/requirements.txt": generated,
+    }
+    for name, contents in files.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_bytes(contents.encode(errors="surrogateescape"))
+
+    def remaining():
+        return {str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*") if p.is_file()}
+
+    delete_existing_files(str(tmp_path), exclude=["docs"])
+    assert remaining() == set(files) - {
+        "requirements.txt",
+        "conda/environments/all.yaml",
+        "python/pkg/requirements_test.txt",
+    }
+
+    delete_existing_files(str(tmp_path), include=["docs/*.txt", "python/pkg/*.toml"])
+    assert "docs/requirements.txt" not in remaining()
+    assert "python/pkg/pyproject.toml" not in remaining()
+    assert "python/pkg/notes.txt" in remaining()
+
+    # Include patterns reach into directories that are not searched by default.
+    delete_existing_files(str(tmp_path), include=["cpp/build/*.txt", "envs/*/env.yaml"])
+    assert "cpp/build/requirements.txt" not in remaining()
+    assert "envs/dev/env.yaml" not in remaining()
+    assert "envs/dev/lib/requirements.txt" in remaining()
+    assert ".git/objects/requirements.txt" in remaining()
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_generate(tmp_path, max_workers):
+    current_dir = pathlib.Path(__file__).parent
+    config_file = tmp_path / "dependencies.yaml"
+    config_file.write_text((current_dir / "examples" / "overlapping-deps" / "dependencies.yaml").read_text())
+    pyproject_file = tmp_path / "output" / "actual" / "pyproject.toml"
+    pyproject_file.parent.mkdir(parents=True)
+    pyproject = (
+        '[build-system]\nbuild-backend = "rapids_build_backend.build_meta"\n\n'
+        '[tool.rapids-build-backend]\nbuild-backend = "scikit_build_core.build"\n'
+    )
+    pyproject_file.write_text(pyproject)
+    parsed_config = _config.load_config_from_file(config_file)
+
+    generated = list(generate(parsed_config=parsed_config, max_workers=max_workers))
+    # Nothing is written.
+    assert [str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*") if p.is_file()] == [
+        "dependencies.yaml",
+        "output/actual/pyproject.toml",
+    ]
+    assert pyproject_file.read_text() == pyproject
+
+    make_dependency_files(
+        parsed_config=parsed_config,
+        file_keys=list(parsed_config.files),
+        output=None,
+        matrix=None,
+        prepend_channels=[],
+        to_stdout=False,
+    )
+    written = {str(p): p.read_text() for p in tmp_path.rglob("*") if p.is_file() and p != config_file}
+    assert written == {generated_file.path: generated_file.contents for generated_file in generated}
+
+    # Both file keys editing pyproject.toml are applied to a single parsed document.
+    pyproject_file.write_text(pyproject)
+    with mock.patch("tomlkit.parse", wraps=tomlkit.parse) as mock_parse, mock.patch(
+        "tomlkit.dumps", wraps=tomlkit.dumps
+    ) as mock_dumps:
+        build_pyproject, more_build_pyproject = generate(
+            parsed_config=parsed_config, file_keys=["build_deps", "even_more_build_deps"], max_workers=max_workers
+        )
+    assert (mock_parse.call_count, mock_dumps.call_count) == (1, 1)
+    # Each file key reports its own dependencies, and the contents with all edits.
+    assert (build_pyproject.file_key, more_build_pyproject.file_key) == ("build_deps", "even_more_build_deps")
+    assert "numpy>=2.0" in build_pyproject.dependencies
+    assert "pandas<3.0" in more_build_pyproject.dependencies
+    assert build_pyproject.contents == more_build_pyproject.contents
+    pyproject_toml = tomlkit.parse(more_build_pyproject.contents)
+    assert "numpy>=2.0" in pyproject_toml["build-system"]["requires"]
+    assert "pandas<3.0" in pyproject_toml["tool"]["rapids-build-backend"]["requires"]
+
+    (requirements,) = generate(
+        parsed_config=parsed_config,
+        file_keys=["test_deps"],
+        output={_config.Output.REQUIREMENTS},
+        matrix={"cuda": ["11.8"]},
+    )
+    assert requirements.file_key == "test_deps"
+    assert requirements.matrix_combo == {"cuda": "11.8"}
+    assert requirements.path == str(tmp_path / "python" / "requirements_test_deps_cuda-118.txt")
+    assert all(dep in requirements.contents for dep in requirements.dependencies)
+
+
+def test_resolve_dependencies():
+    current_dir = pathlib.Path(__file__).parent
+    parsed_config = _config.load_config_from_file(current_dir / "examples" / "integration" / "dependencies.yaml")
+    matrix = {"cuda": ["11.5"]}
+
+    with mock.patch(
+        "rapids_dependency_file_generator._rapids_dependency_file_generator.make_dependency_file"
+    ) as mock_make_dependency_file:
+        resolved = resolve_dependencies(parsed_config, ["all"], _config.Output.CONDA, matrix)
+    mock_make_dependency_file.assert_not_called()
+
+    (generated,) = generate(
+        parsed_config=parsed_config, file_keys=["all"], output={_config.Output.CONDA}, matrix=matrix
+    )
+    assert resolved.deps_list == generated.dependencies
+    assert resolved.requirements == sorted(dep for dep in generated.dependencies if isinstance(dep, str))
+
+    # Dependencies are merged across file keys and matrix combinations.
+    resolved = resolve_dependencies(parsed_config, ["all", "test"], _config.Output.REQUIREMENTS)
+    expected = set()
+    for generated in generate(
+        parsed_config=parsed_config, file_keys=["all", "test"], output={_config.Output.REQUIREMENTS}
+    ):
+        expected.update(generated.dependencies)
+    assert resolved.requirements == sorted(expected)
+    assert resolved.pip == []
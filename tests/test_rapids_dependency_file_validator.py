@@ -1,5 +1,11 @@
+from unittest import mock
+
 import pytest
-from rapids_dependency_file_generator._rapids_dependency_file_validator import UnusedDependencySetWarning, validate_dependencies
+from rapids_dependency_file_generator._rapids_dependency_file_validator import (
+    UnusedDependencySetWarning,
+    _validator,
+    validate_dependencies,
+)
 
 
 def test_validate_dependencies_warn_on_unused_deps():
@@ -31,3 +37,22 @@ def test_validate_dependencies_warn_on_unused_deps():
     assert len(warnings) == 2
     assert warnings[0].message.args[0] == 'Dependency set "c" is not referred to anywhere in "files:"'
     assert warnings[1].message.args[0] == 'Dependency set "d" is not referred to anywhere in "files:"'
+
+
+def test_validate_dependencies_reuses_validator():
+    assert _validator() is _validator()
+
+
+def test_validate_dependencies_only_collects_errors_when_invalid(capsys):
+    valid = {
+        "files": {"all": {"output": "conda", "includes": ["a"]}},
+        "channels": [],
+        "dependencies": {"a": {"common": []}},
+    }
+    with mock.patch("jsonschema.exceptions.best_match") as mock_best_match:
+        validate_dependencies(valid)
+    mock_best_match.assert_not_called()
+
+    with pytest.raises(RuntimeError, match="The provided dependencies data is invalid."):
+        validate_dependencies({**valid, "invalid": True})
+    assert "The provided dependency file contains schema errors." in capsys.readouterr().err
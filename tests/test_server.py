@@ -0,0 +1,133 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from rapids_dependency_file_generator import _cli
+from rapids_dependency_file_generator._rapids_dependency_file_validator import UnusedDependencySetWarning
+from rapids_dependency_file_generator._server import DependencyFileServer, query
+
+
+@pytest.fixture
+def server(tmp_path):
+    with DependencyFileServer(str(tmp_path / "dfg.sock")) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def stdout_request(config_file, matrix):
+    return {
+        "config": str(config_file),
+        "file_keys": ["test"],
+        "output": ["requirements"],
+        "matrix": matrix,
+        "to_stdout": True,
+    }
+
+
+def test_server_answers_from_memory(server, config_file, capsys):
+    socket_path = server.server_address
+    response = query(socket_path, stdout_request(config_file, {"cuda": ["12.0"]}))
+    _cli.main(["--config", str(config_file), "--file-key", "test", "--output", "requirements", "--matrix", "cuda=12.0"])
+    assert response["stdout"] == capsys.readouterr().out
+    assert "cupy-cuda12x" in response["stdout"]
+
+    loaded = server.configs[str(config_file)]
+    response = query(socket_path, stdout_request(config_file, {"cuda": ["11.8"]}))
+    assert "cupy-cuda11x" in response["stdout"]
+    assert server.configs[str(config_file)] is loaded
+
+    # The config is loaded again when it changes.
+    config_file.write_text(config_file.read_text().replace("[pytest]", "[pytest, pytest-xdist]"))
+    response = query(socket_path, stdout_request(config_file, {"cuda": ["11.8"]}))
+    assert "pytest-xdist" in response["stdout"]
+    assert server.configs[str(config_file)] is not loaded
+
+
+def test_server_writes_files(server, config_file, tmp_path):
+    response = query(server.server_address, {"config": str(config_file), "write_if_changed": True})
+    assert response["stderr"] == "5 files written, 0 unchanged\n"
+    assert "cupy-cuda11x" in (tmp_path / "python" / "requirements_test_cuda-118.txt").read_text()
+
+
+def test_server_reports_errors_and_warnings(server, config_file):
+    with pytest.raises(ValueError, match="is not supported"):
+        query(
+            server.server_address,
+            {**stdout_request(config_file, {}), "file_keys": ["test", "test"], "output": ["pyproject"]},
+        )
+
+    config_file.write_text(config_file.read_text() + "  unused:\n    common: []\n")
+    with pytest.warns(UnusedDependencySetWarning, match="unused"):
+        query(server.server_address, stdout_request(config_file, {"cuda": ["12.0"]}))
+
+
+def test_cli_uses_running_server(server, config_file, tmp_path, capsys):
+    argv = ["--config", str(config_file), "--file-key", "test", "--output", "requirements", "--matrix", "cuda=12.0"]
+    _cli.main([*argv, "--server", server.server_address])
+    assert "cupy-cuda12x" in capsys.readouterr().out
+    assert str(config_file) in server.configs
+
+    # Without a server, files are generated by the client.
+    _cli.main([*argv, "--server", str(tmp_path / "missing.sock")])
+    assert "cupy-cuda12x" in capsys.readouterr().out
+
+
+def test_server_replaces_stale_socket(server, tmp_path):
+    with pytest.raises(ValueError, match="already listening"):
+        DependencyFileServer(server.server_address)
+
+    stale_path = str(tmp_path / "stale.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(stale_path)
+    stale.close()
+    with DependencyFileServer(stale_path):
+        pass
+
+
+def test_cli_forwards_options_to_server(server, config_file, tmp_path):
+    argv = ["--config", str(config_file), "--server", server.server_address]
+    _cli.main([*argv, "--jobs", "2", "--cache-dir", str(tmp_path / "cache")])
+    assert str(config_file) in server.configs
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    assert (tmp_path / "python" / "requirements_test_cuda-118.txt").exists()
+
+    # Options the server does not support are handled locally.
+    server.configs.clear()
+    _cli.main([*argv, "--clean-include", "python/*.txt"])
+    assert server.configs == {}
+
+
+def test_cli_shows_server_diagnostics(config_file, tmp_path, capsys):
+    # The server runs in another process, so its diagnostics only reach the client
+    # through the response.
+    socket_path = str(tmp_path / "dfg.sock")
+    process = subprocess.Popen(
+        [sys.executable, "-c", "import sys; from rapids_dependency_file_generator._cli import main; main(sys.argv[1:])"]
+        + ["--serve", socket_path],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path):
+            assert process.poll() is None and time.monotonic() < deadline
+            time.sleep(0.01)
+
+        config_file.write_text(
+            config_file.read_text().replace("  docs:\n    output:", "  docs:\n    bogus: 1\n    output:")
+        )
+        with pytest.raises(RuntimeError, match="invalid"):
+            _cli.main(["--config", str(config_file), "--server", socket_path])
+    finally:
+        process.terminate()
+        process.wait()
+    stderr = capsys.readouterr().err
+    assert "The provided dependency file contains schema errors." in stderr
+    assert "bogus" in stderr
@@ -0,0 +1,77 @@
+import json
+import pathlib
+import shutil
+
+from rapids_dependency_file_generator import Timings, _cli
+from rapids_dependency_file_generator._config import Output, load_config_from_file
+from rapids_dependency_file_generator._rapids_dependency_file_generator import make_dependency_files
+
+CURRENT_DIR = pathlib.Path(__file__).parent
+
+
+def generate_matrix_glob(tmp_path):
+    shutil.copytree(CURRENT_DIR / "examples" / "matrix-glob", tmp_path, dirs_exist_ok=True)
+    make_dependency_files(
+        parsed_config=load_config_from_file(tmp_path / "dependencies.yaml"),
+        file_keys=["dev"],
+        output=None,
+        matrix=None,
+        prepend_channels=[],
+        to_stdout=False,
+    )
+
+
+def test_timings_record_phases_and_counters(tmp_path):
+    timings = Timings()
+    with timings.activate():
+        generate_matrix_glob(tmp_path)
+
+    assert list(timings.phases) == [
+        "load_config",
+        "load_config/read",
+        "load_config/yaml",
+        "load_config/validate",
+        "load_config/parse",
+        "generate",
+        "generate/plan",
+        "generate/resolve",
+        "generate/render",
+        "generate/write",
+        "generate/finish",
+    ]
+    assert timings.phases["generate/write"].calls == 3
+    assert timings.phases["generate"].seconds >= timings.phases["generate/write"].seconds
+    assert list(timings.file_keys) == ["dev"]
+    assert list(timings.output_types) == [Output.CONDA.value]
+    assert set(timings.file_keys["dev"]) == {"resolve", "render", "write"}
+    assert timings.counters["matrix_combinations"] == 3
+    assert timings.counters["dependency_sets_resolved"] == 3
+    # 10.0 is tested against both glob patterns, 11.8 against the first one, and
+    # 12.0 against both.
+    assert timings.counters["glob_matches"] == 5
+
+    summary = timings.summary()
+    assert "    resolve" in summary
+    assert "glob_matches" in summary
+
+
+def test_timings_are_only_recorded_while_active(tmp_path):
+    timings = Timings()
+    with timings.activate():
+        pass
+    generate_matrix_glob(tmp_path)
+    assert timings.to_dict() == {"phases": {}, "file_keys": {}, "output_types": {}, "counters": {}}
+
+
+def test_cli_timings(tmp_path, capsys):
+    shutil.copytree(CURRENT_DIR / "examples" / "matrix-glob", tmp_path, dirs_exist_ok=True)
+    timings_file = tmp_path / "timings.json"
+    _cli.main(["--config", str(tmp_path / "dependencies.yaml"), "--timings", "--timings-json", str(timings_file)])
+
+    stderr = capsys.readouterr().err
+    assert stderr.startswith("Phases:\n  total")
+    assert "File keys:\n  dev" in stderr
+
+    timings = json.loads(timings_file.read_text())
+    assert timings["phases"]["total/generate/write"]["calls"] == 3
+    assert timings["counters"]["matrix_combinations"] == 3
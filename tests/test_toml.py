@@ -0,0 +1,141 @@
+import itertools
+import pathlib
+
+import pytest
+import tomlkit
+
+from rapids_dependency_file_generator._toml import splice_array
+
+CURRENT_DIR = pathlib.Path(__file__).parent
+
+VALUES = ["numpy>=2.0", 'tomli; python_version<"3.11"', "it's", "back\\slash", "ünïcode"]
+COMMENT = "This list was generated by `rapids-dependency-file-generator`."
+
+
+def edit_with_tomlkit(contents, table, key, values):
+    document = tomlkit.parse(contents)
+    array = tomlkit.array()
+    for value in values:
+        array.add_line(value)
+    array.add_line(indent="")
+    array.comment(COMMENT)
+    container = document
+    for section in table.split("."):
+        container = container[section]
+    container[key] = array
+    return tomlkit.dumps(document)
+
+
+ARRAYS = [
+    "[]",
+    '["old"]',
+    '[ "old",\n  "older" ]',
+    '[\n    "old", # a comment with [brackets] and "quotes"\n    \'literal]\',\n]',
+    '[\n  """multi\nline]""",\n  [1, 2], {a = "}"},\n]',
+]
+TRAILERS = ["\n", " \n", "  # comment\n", "# comment  \n", "\t#\n", "\r\n", " \r\n", " # comment\r\n", ""]
+
+DOCUMENTS = [
+    (
+        '[build-system]\nbuild-backend = "x"\nrequires = {array}{trailer}',
+        "build-system",
+        "requires",
+    ),
+    (
+        '# header comment\n[build-system]\nrequires = {array}{trailer}build-backend = "x"\n\n[project]\nname = "x"\n',
+        "build-system",
+        "requires",
+    ),
+    (
+        '[project]\nname = "x"\n  dependencies   =   {array}{trailer}\n[project.optional-dependencies]\ntest = ["pytest"]\n',
+        "project",
+        "dependencies",
+    ),
+    (
+        '[project]\nauthors = [{{name = "a"}}]\nlicense = {{text = "MIT"}}\ndate = 1979-05-27 07:32:00Z\n'
+        'description = """\n[build-system]\nrequires = []\n"""\ndependencies={array}{trailer}',
+        "project",
+        "dependencies",
+    ),
+    (
+        '[tool.other]\nx = 1\n\n[project]\nname = "x"\n\n[tool.rapids-build-backend]\nrequires = {array}{trailer}'
+        "\n[[tool.rapids-build-backend.plugins]]\nname = 'a'\n",
+        "tool.rapids-build-backend",
+        "requires",
+    ),
+    (
+        "[tool]\n[tool.rapids-build-backend] # comment\nbuild-backend = 'x'\nrequires = {array}{trailer}[other]\ny = 2\n",
+        "tool.rapids-build-backend",
+        "requires",
+    ),
+]
+
+
+def documents():
+    for (template, table, key), array, trailer in itertools.product(DOCUMENTS, ARRAYS, TRAILERS):
+        yield template.format(array=array, trailer=trailer), table, key
+
+
+@pytest.mark.parametrize("values", [VALUES, []], ids=["values", "empty"])
+def test_splice_array_is_identical_to_tomlkit(values):
+    spliced_documents = 0
+    for contents, table, key in documents():
+        try:
+            expected = edit_with_tomlkit(contents, table, key, values)
+        except tomlkit.exceptions.TOMLKitError:
+            # The template is not valid TOML with this trailer.
+            continue
+        actual = splice_array(contents, table, key, values, COMMENT)
+        if actual is not None:
+            spliced_documents += 1
+            assert actual == expected, contents
+    assert spliced_documents > len(DOCUMENTS) * len(ARRAYS)
+
+
+@pytest.mark.parametrize(
+    "pyproject_file",
+    sorted(CURRENT_DIR.glob("examples/*/output/expected/pyproject.toml")),
+    ids=lambda path: path.parts[-4],
+)
+def test_splice_array_on_examples(pyproject_file):
+    contents = pyproject_file.read_text()
+    document = tomlkit.parse(contents)
+    for table, key in [("build-system", "requires"), ("project", "dependencies")]:
+        if key in document.get(table, {}):
+            assert splice_array(contents, table, key, VALUES, COMMENT) == edit_with_tomlkit(
+                contents, table, key, VALUES
+            )
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        # The table or the key does not exist
+        '[project]\nname = "x"\n',
+        '[build-system]\nrequires = ["x"]\n',
+        # The table is defined with dotted keys or an inline table
+        'project.dependencies = ["x"]\n',
+        '[project]\nname = "x"\n[other]\n[project.dependencies]\n',
+        'project = {dependencies = ["x"]}\n',
+        '[project]\ndependencies.x = "y"\n',
+        '[[project]]\ndependencies = ["x"]\n',
+        # Quoted keys
+        '["project"]\ndependencies = ["x"]\n',
+        '[project]\n"dependencies" = ["x"]\n',
+        # The value is not an array
+        '[project]\ndependencies = "x"\n',
+        # Malformed documents
+        '[project]\ndependencies = ["x"\n',
+        '[project]\ndependencies = ["x"] name = "y"\n',
+        '[project]\ndependencies = ["x"]\ndependencies = ["y"]\n',
+        '[project]\nname = "x\ndependencies = ["x"]\n',
+        '\ufeff[project]\ndependencies = ["x"]\n',
+    ],
+)
+def test_splice_array_leaves_ambiguous_documents_to_tomlkit(contents):
+    assert splice_array(contents, "project", "dependencies", VALUES, COMMENT) is None
+
+
+def test_splice_array_only_supports_strings():
+    contents = '[project]\ndependencies = ["x"]\n'
+    assert splice_array(contents, "project", "dependencies", [{"pip": ["x"]}], COMMENT) is None
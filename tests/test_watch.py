@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from rapids_dependency_file_generator import _cli
+from rapids_dependency_file_generator._watch import watch
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def stop():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def start(target, *args, **kwargs):
+    thread = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_watch_debounces_changes(tmp_path, stop):
+    watched = tmp_path / "dependencies.yaml"
+    watched.write_text("a")
+    calls = []
+
+    def on_change():
+        calls.append(watched.read_text() if watched.exists() else None)
+
+    thread = start(watch, lambda: [str(watched)], on_change, interval=0.01, debounce=0.1, stop=stop)
+
+    for contents in ["ab", "abc", "abcd"]:
+        time.sleep(0.02)
+        watched.write_text(contents)
+    wait_for(lambda: calls)
+    time.sleep(0.2)
+    assert calls == ["abcd"]
+
+    # Deleting a file is a change too.
+    watched.unlink()
+    wait_for(lambda: len(calls) == 2)
+    assert calls[1] is None
+    stop.set()
+    thread.join()
+
+
+def test_watch_continues_after_errors(tmp_path, stop, capsys):
+    watched = tmp_path / "dependencies.yaml"
+    watched.write_text("a")
+    calls = []
+
+    def on_change():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ValueError("invalid config")
+
+    thread = start(watch, lambda: [str(watched)], on_change, interval=0.01, debounce=0.01, stop=stop)
+    time.sleep(0.05)
+    watched.write_text("b")
+    wait_for(lambda: calls)
+    time.sleep(0.05)
+    watched.write_text("c")
+    wait_for(lambda: len(calls) == 2)
+    stop.set()
+    thread.join()
+    assert "ValueError: invalid config" in capsys.readouterr().err
+
+
+@pytest.fixture
+def watching(stop):
+    # Make the CLI watch until stop is set, and set the yielded event once it
+    # took the first snapshot of the watched files.
+    event = threading.Event()
+
+    class NotifyingEvent(threading.Event):
+        def wait(self, timeout=None):
+            event.set()
+            return stop.wait(timeout)
+
+    def watch_until_stopped(*args, **kwargs):
+        watch(*args, **{**kwargs, "interval": 0.01, "debounce": 0.01, "stop": NotifyingEvent()})
+
+    with mock.patch.object(_cli, "watch", watch_until_stopped):
+        yield event
+
+
+def test_watch_cli(tmp_path, config_file, stop, watching, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    thread = start(_cli.main, ["--config", str(config_file), "--watch"])
+    docs_file = tmp_path / "python" / "requirements_docs.txt"
+    test_file = tmp_path / "python" / "requirements_test_cuda-118.txt"
+    wait_for(watching.is_set)
+    os.utime(test_file, ns=(0, 0))
+
+    config_file.write_text(config_file.read_text().replace("[sphinx]", "[sphinx, myst-parser]"))
+    wait_for(lambda: "myst-parser" in docs_file.read_text())
+    assert test_file.stat().st_mtime_ns == 0
+
+    stop.set()
+    thread.join()
+
+
+def test_watch_cli_clean(tmp_path, config_file, stop, watching, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _cli.main(["--config", str(config_file)])
+    stale_file = tmp_path / "python" / "requirements_stale.txt"
+    stale_file.write_text((tmp_path / "python" / "requirements_docs.txt").read_text())
+
+    thread = start(_cli.main, ["--config", str(config_file), "--watch", "--clean"])
+    wait_for(watching.is_set)
+    stop.set()
+    thread.join()
+    assert not stale_file.exists()
+    assert (tmp_path / "python" / "requirements_docs.txt").exists()
+
+
+def test_watch_cannot_write_to_stdout():
+    with pytest.raises(ValueError, match="--watch"):
+        _cli.validate_args(["--watch", "--file-key", "test", "--output", "requirements", "--matrix", ""])
@@ -0,0 +1,140 @@
+import os
+import pathlib
+import shutil
+import stat
+
+import pytest
+import tomlkit
+
+from rapids_dependency_file_generator import _config
+from rapids_dependency_file_generator._rapids_dependency_file_generator import make_dependency_files
+from rapids_dependency_file_generator._writer import FileWriter
+
+
+def test_file_writer_writes_files(tmp_path):
+    file_path = tmp_path / "output" / "requirements.txt"
+    writer = FileWriter()
+    writer.write(str(file_path), "numpy\n")
+    assert not file_path.exists()
+
+    writer.write(str(file_path), "scipy\n")
+    writer.commit()
+    assert file_path.read_text() == "scipy\n"
+    assert (writer.written, writer.unchanged) == (1, 0)
+    # No temporary files are left behind.
+    assert os.listdir(file_path.parent) == ["requirements.txt"]
+
+
+def test_file_writer_skips_unchanged_files(tmp_path):
+    file_path = tmp_path / "requirements.txt"
+    file_path.write_text("numpy\n")
+    os.utime(file_path, (0, 0))
+
+    writer = FileWriter(write_if_changed=True)
+    writer.write(str(file_path), "numpy\n")
+    writer.commit()
+    assert os.stat(file_path).st_mtime == 0
+    assert (writer.written, writer.unchanged) == (0, 1)
+
+    # Same size, different contents
+    writer.write(str(file_path), "scipy\n")
+    writer.commit()
+    assert file_path.read_text() == "scipy\n"
+    writer.write(str(file_path), "scipy>=1.0\n")
+    writer.write(str(tmp_path / "new.txt"), "pandas\n")
+    writer.commit()
+    assert file_path.read_text() == "scipy>=1.0\n"
+    assert (tmp_path / "new.txt").read_text() == "pandas\n"
+    assert (writer.written, writer.unchanged) == (3, 1)
+
+
+def test_file_writer_preserves_modes_and_symlinks(tmp_path):
+    target = tmp_path / "pyproject.toml"
+    target.write_text("old\n")
+    os.chmod(target, 0o640)
+    link = tmp_path / "link.toml"
+    link.symlink_to(target)
+
+    writer = FileWriter()
+    writer.write(str(link), "new\n")
+    writer.write(str(tmp_path / "created.txt"), "new\n")
+    writer.commit()
+    assert link.is_symlink()
+    assert target.read_text() == "new\n"
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(tmp_path / "created.txt").st_mode) == 0o666 & ~umask
+
+
+@pytest.mark.parametrize("all_or_nothing", [False, True])
+def test_make_dependency_files_on_failure(tmp_path, all_or_nothing):
+    config_file = tmp_path / "dependencies.yaml"
+    config_file.write_text(
+        """\
+files:
+  good:
+    output: requirements
+    includes: [common]
+  bad:
+    output: requirements
+    matrix:
+      cuda: ["10.0"]
+    includes: [specific]
+dependencies:
+  common:
+    common:
+      - output_types: [requirements]
+        packages: [numpy]
+  specific:
+    specific:
+      - output_types: [requirements]
+        matrices:
+          - matrix:
+              cuda: "12.*"
+            packages: [cupy]
+"""
+    )
+    writer = FileWriter(all_or_nothing=all_or_nothing)
+    with pytest.raises(ValueError, match="No matching matrix found"):
+        make_dependency_files(
+            parsed_config=_config.load_config_from_file(config_file),
+            file_keys=["good", "bad"],
+            output=None,
+            matrix=None,
+            prepend_channels=[],
+            to_stdout=False,
+            writer=writer,
+        )
+    if all_or_nothing:
+        assert not (tmp_path / "python").exists() or os.listdir(tmp_path / "python") == []
+        assert writer.written == 0
+    else:
+        assert os.listdir(tmp_path / "python") == ["requirements_good.txt"]
+        assert writer.written == 1
+
+
+def test_make_dependency_files_merges_edits_to_one_pyproject(tmp_path):
+    current_dir = pathlib.Path(__file__).parent
+    config_file = tmp_path / "dependencies.yaml"
+    shutil.copyfile(current_dir / "examples" / "overlapping-deps" / "dependencies.yaml", config_file)
+    pyproject_file = tmp_path / "output" / "actual" / "pyproject.toml"
+    pyproject_file.parent.mkdir(parents=True)
+    pyproject_file.write_text(
+        '[build-system]\nbuild-backend = "rapids_build_backend.build_meta"\n\n'
+        '[tool.rapids-build-backend]\nbuild-backend = "scikit_build_core.build"\n'
+    )
+
+    make_dependency_files(
+        parsed_config=_config.load_config_from_file(config_file),
+        file_keys=["build_deps", "even_more_build_deps"],
+        output=None,
+        matrix=None,
+        prepend_channels=[],
+        to_stdout=False,
+    )
+    # Both file keys' edits end up in the file.
+    pyproject = tomlkit.loads(pyproject_file.read_text())
+    assert "numpy>=2.0" in pyproject["build-system"]["requires"]
+    assert "pandas<3.0" in pyproject["tool"]["rapids-build-backend"]["requires"]
@@ -0,0 +1,71 @@
+import pathlib
+from unittest import mock
+
+import pytest
+import yaml
+
+from rapids_dependency_file_generator import _config, _yaml
+from rapids_dependency_file_generator._rapids_dependency_file_generator import make_dependency_file
+
+CURRENT_DIR = pathlib.Path(__file__).parent
+
+EXPECTED_CONDA_FILES = sorted(CURRENT_DIR.glob("examples/*/output/expected/**/*.yaml"))
+
+DUMPERS = [
+    pytest.param(yaml.SafeDumper, id="python"),
+    pytest.param(
+        getattr(yaml, "CSafeDumper", None),
+        id="libyaml",
+        marks=pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML was built without libyaml"),
+    ),
+]
+
+LOADERS = [
+    pytest.param(yaml.SafeLoader, id="python"),
+    pytest.param(
+        getattr(yaml, "CSafeLoader", None),
+        id="libyaml",
+        marks=pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML was built without libyaml"),
+    ),
+]
+
+
+def test_uses_libyaml_when_available():
+    if yaml.__with_libyaml__:
+        assert _yaml.SafeLoader is yaml.CSafeLoader
+        assert _yaml.SafeDumper is yaml.CSafeDumper
+    else:
+        assert _yaml.SafeLoader is yaml.SafeLoader
+        assert _yaml.SafeDumper is yaml.SafeDumper
+
+
+@pytest.mark.parametrize("dumper", DUMPERS)
+@pytest.mark.parametrize(
+    "expected_file",
+    EXPECTED_CONDA_FILES,
+    ids=[str(p.relative_to(CURRENT_DIR / "examples")) for p in EXPECTED_CONDA_FILES],
+)
+def test_conda_output_is_identical_for_all_dumpers(dumper, expected_file):
+    expected = expected_file.read_text()
+    env = yaml.safe_load(expected)
+
+    with mock.patch.object(_yaml, "SafeDumper", dumper):
+        actual = make_dependency_file(
+            file_type=_config.Output.CONDA,
+            conda_env_name=env.get("name"),
+            file_name=expected_file.name,
+            config_file="dependencies.yaml",
+            output_dir=".",
+            conda_channels=env["channels"],
+            dependencies=env["dependencies"],
+            extras=None,
+        )
+    # Skip the header, which points at the config file relative to the output directory.
+    assert actual.split("\n", 2)[2] == expected.split("\n", 2)[2]
+
+
+@pytest.mark.parametrize("loader", LOADERS)
+def test_load_is_identical_for_all_loaders(loader):
+    config_file = CURRENT_DIR / "examples" / "integration" / "dependencies.yaml"
+    with mock.patch.object(_yaml, "SafeLoader", loader):
+        assert _yaml.load(config_file.read_bytes()) == yaml.load(config_file.read_text(), Loader=yaml.SafeLoader)